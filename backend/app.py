@@ -17,7 +17,7 @@ def create_app(config_class=Config):
     jwt.init_app(app)
     
     # 配置CORS
-    CORS(app, origins=app.config.get('CORS_ORIGINS', ['*']))
+    CORS(app, origins=app.config.get('CORS_ORIGINS', ['*']), expose_headers=['ETag', 'X-Catalog-Version'])
     
     # JWT错误处理
     @jwt.expired_token_loader
@@ -55,6 +55,14 @@ def create_app(config_class=Config):
     app.register_blueprint(nav_bp, url_prefix='/admin/navs') # 导航接口
     app.register_blueprint(categories_bp, url_prefix='/admin/categories') # 分类接口
     
+    # 目录变更后发布匿名主页静态快照
+    from utils.publisher import home_publisher
+    home_publisher.init_app(app)
+    
+    # 请求级数据库连接与写请求工作单元（须在快照发布之后注册，保证先提交再发布）
+    from utils.db import init_request_connection
+    init_request_connection(app)
+    
     # 添加根路径路由
     @app.route('/')
     def index():
@@ -110,8 +118,17 @@ def create_app(config_class=Config):
         try:
             from models.category import Category
             from models.navs import Nav
+            from models.catalog_change import CatalogChange
+            from utils.migrations import run_migrations
             Category.create_table()
             Nav.create_table()
+            applied = run_migrations()
+            if applied:
+                app.logger.info(f"已应用结构迁移: {applied}")
+            # 结构（表、索引、全文索引、触发器）均由迁移维护；启动时只做数据回填与日志压缩
+            Category.backfill_pinyin()
+            Nav.backfill_pinyin()
+            CatalogChange.compact()
         except Exception as e:
             app.logger.error(f"原生SQL表创建失败: {e}")
     
@@ -27,4 +27,8 @@ class Config:
     ]
     
     # 安全配置
-    JSON_AS_ASCII = False  # 支持中文JSON响应
\ No newline at end of file
+    JSON_AS_ASCII = False  # 支持中文JSON响应
+    
+    # 主页静态快照：目录变更后将匿名主页JSON发布到 web/data，供 Nginx/Apache 直接提供
+    HOME_SNAPSHOT_ENABLED = True
+    HOME_SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web', 'data')
\ No newline at end of file
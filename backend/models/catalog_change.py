@@ -0,0 +1,145 @@
+from datetime import datetime
+
+from utils.db import get_connection, commit
+
+# 延迟导入避免循环导入
+def get_db():
+    from flask import current_app
+    return current_app.extensions['sqlalchemy']
+
+
+class CatalogChange:
+    """
+    目录变更日志（增量同步）
+    表名：catalog_changes
+    字段：version（单调递增）, entity（nav/category）, entity_id, op（insert/update/delete）, changed_at
+    由 navs / nav_categories 上的触发器在同一事务内写入，任何写入路径都不会遗漏
+    日志压缩后，早于 catalog_meta.change_log_floor 的版本无法增量同步，客户端需全量重新拉取
+    """
+
+    ENTITY_NAV = 'nav'
+    ENTITY_CATEGORY = 'category'
+
+    def __init__(self, **kwargs):
+        self.version = kwargs.get('version')
+        self.entity = kwargs.get('entity')
+        self.entity_id = kwargs.get('entity_id')
+        self.op = kwargs.get('op')
+        self.changed_at = kwargs.get('changed_at')
+
+    @staticmethod
+    def create_table(conn, text):
+        """创建变更日志表、元数据表及触发器（由结构迁移调用，可重复执行）"""
+        conn.execute(text('''
+            CREATE TABLE IF NOT EXISTS catalog_changes (
+                version INTEGER PRIMARY KEY AUTOINCREMENT,
+                entity TEXT NOT NULL,
+                entity_id INTEGER NOT NULL,
+                op TEXT NOT NULL,
+                changed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        '''))
+        conn.execute(text('''
+            CREATE TABLE IF NOT EXISTS catalog_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            )
+        '''))
+        conn.execute(text(
+            "INSERT OR IGNORE INTO catalog_meta (key, value) VALUES ('change_log_floor', 0)"
+        ))
+        conn.execute(text(
+            "INSERT OR IGNORE INTO catalog_meta (key, value) VALUES ('catalog_version', 0)"
+        ))
+
+        for table, entity in (('navs', CatalogChange.ENTITY_NAV), ('nav_categories', CatalogChange.ENTITY_CATEGORY)):
+            for event, ref in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+                conn.execute(text(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_log_{event.lower()}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        INSERT INTO catalog_changes (entity, entity_id, op)
+                        VALUES ('{entity}', {ref}.id, '{event.lower()}');
+                    END
+                '''))
+
+    @staticmethod
+    def current_version():
+        """当前最新变更版本号（无变更时为0）"""
+        db = get_db()
+        with get_connection() as conn:
+            row = conn.execute(db.text(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'catalog_changes'"
+            )).fetchone()
+            return row[0] if row else 0
+
+    @staticmethod
+    def floor_version():
+        """日志压缩下界：since 小于该值时无法增量同步"""
+        db = get_db()
+        with get_connection() as conn:
+            row = conn.execute(db.text(
+                "SELECT value FROM catalog_meta WHERE key = 'change_log_floor'"
+            )).fetchone()
+            return row[0] if row else 0
+
+    @staticmethod
+    def since(version):
+        """
+        获取指定版本之后的变更，同一实体只保留最后一次操作
+        返回 (list[CatalogChange], current_version)
+        """
+        db = get_db()
+        with get_connection() as conn:
+            rows = conn.execute(db.text('''
+                SELECT c.version, c.entity, c.entity_id, c.op, c.changed_at
+                FROM catalog_changes c
+                JOIN (
+                    SELECT entity, entity_id, MAX(version) AS version
+                    FROM catalog_changes
+                    WHERE version > :since
+                    GROUP BY entity, entity_id
+                ) latest ON latest.version = c.version
+                ORDER BY c.version ASC
+            '''), {'since': version}).fetchall()
+            changes = [CatalogChange(
+                version=row[0],
+                entity=row[1],
+                entity_id=row[2],
+                op=row[3],
+                changed_at=datetime.fromisoformat(row[4]) if row[4] else None
+            ) for row in rows]
+            current = max([version] + [c.version for c in changes])
+            return changes, current
+
+    @staticmethod
+    def compact(keep=10000):
+        """
+        压缩日志：仅保留最近 keep 条变更，并上移压缩下界
+        返回删除的条数
+        """
+        db = get_db()
+        with get_connection() as conn:
+            row = conn.execute(db.text(
+                'SELECT version FROM catalog_changes ORDER BY version DESC LIMIT 1 OFFSET :keep'
+            ), {'keep': keep}).fetchone()
+            if not row:
+                return 0
+            floor = row[0]
+            result = conn.execute(db.text(
+                'DELETE FROM catalog_changes WHERE version <= :floor'
+            ), {'floor': floor})
+            conn.execute(db.text(
+                "UPDATE catalog_meta SET value = MAX(value, :floor) WHERE key = 'change_log_floor'"
+            ), {'floor': floor})
+            commit(conn)
+            return result.rowcount
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'entity': self.entity,
+            'entity_id': self.entity_id,
+            'op': self.op,
+            'changed_at': self.changed_at.strftime('%Y-%m-%d %H:%M:%S') if self.changed_at else None
+        }
@@ -1,5 +1,12 @@
 from datetime import datetime
 
+from utils.catalog import get_catalog_version
+from utils.counts import TOTAL_ESTIMATED, TOTAL_EXACT, TOTAL_NONE, count_key, filter_counts, paged_total
+from utils.db import get_connection, commit
+from utils.rows import row_getter
+from utils.search import create_fts_index, fts_table_exists, pinyin_keys, pinyin_keyword, prefix_range, trigram_query
+from utils.timestamps import EPOCH_COLUMN_DEFINITION, LazyTimestamp
+
 # 延迟导入避免循环导入
 def get_db():
     from flask import current_app
@@ -9,7 +16,23 @@ class Category:
     """
     导航分类模型
     支持层级结构的分类管理
+    name_pinyin / name_initials 为名称拼音全拼/首字母检索键，保存时生成
+    实例使用 __slots__，查询结果按列名映射；created_at 以整数秒（epoch）存储，保留数据库原始值，访问时才解析
+    depth / visible / children 仅分类树缓存（utils.category_tree）中的实例有
+    nav_count / public_nav_count（直属导航项总数/公开数）仅带计数查询（get_all(with_counts=True)）的实例有
     """
+
+    __slots__ = ('id', 'parent_id', 'name', 'description', 'sort_order', 'level', 'is_public',
+                 '_created_at', '_created_at_raw', 'depth', 'visible', 'children', 'nav_count', 'public_nav_count')
+
+    # 构建实例所需的列（按列名取值，与查询列顺序无关）
+    COLUMNS = ('id', 'parent_id', 'name', 'description', 'sort_order', 'level', 'is_public', 'created_at')
+    COUNT_COLUMNS = ('nav_count', 'public_nav_count')
+
+    # 分类层级上限（顶级为1）
+    MAX_LEVEL = 5
+
+    created_at = LazyTimestamp()
     
     def __init__(self, **kwargs):
         self.id = kwargs.get('id')
@@ -20,13 +43,43 @@ class Category:
         self.level = kwargs.get('level', 1)
         self.is_public = kwargs.get('is_public', True)
         self.created_at = kwargs.get('created_at', datetime.utcnow())
+
+    @staticmethod
+    def _from_rows(rows):
+        """将查询结果行转换为 Category 列表（绕过 __init__，不解析时间字段）"""
+        if not rows:
+            return []
+        getter = row_getter(rows[0]._fields, Category.COLUMNS)
+        categories = []
+        for row in rows:
+            category = Category.__new__(Category)
+            (category.id, category.parent_id, category.name, category.description, category.sort_order,
+             category.level, is_public, category._created_at_raw) = getter(row)
+            category.is_public = bool(is_public)
+            category._created_at = None
+            categories.append(category)
+        if 'nav_count' in rows[0]._fields:
+            count_getter = row_getter(rows[0]._fields, Category.COUNT_COLUMNS)
+            for category, row in zip(categories, rows):
+                category.nav_count, category.public_nav_count = count_getter(row)
+        return categories
+
+    @property
+    def created_at_text(self):
+        """created_at 的 'YYYY-MM-DD HH:MM:SS' 格式字符串（无需解析为 datetime）"""
+        return Category.created_at.text(self)
+
+    @property
+    def created_at_epoch(self):
+        """created_at 的整数秒（epoch），用于排序"""
+        return Category.created_at.epoch(self)
     
     @staticmethod
     def create_table():
         """创建导航分类表"""
         db = get_db()
-        with db.engine.connect() as conn:
-            conn.execute(db.text('''
+        with get_connection() as conn:
+            conn.execute(db.text(f'''
                 CREATE TABLE IF NOT EXISTS nav_categories (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     parent_id INTEGER DEFAULT NULL,
@@ -35,12 +88,376 @@ class Category:
                     sort_order INTEGER DEFAULT 0,
                     level INTEGER DEFAULT 1,
                     is_public BOOLEAN DEFAULT TRUE,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    created_at {EPOCH_COLUMN_DEFINITION},
                     FOREIGN KEY (parent_id) REFERENCES nav_categories(id)
                 )
             '''))
-            conn.commit()
+            commit(conn)
+
+    @staticmethod
+    def backfill_pinyin():
+        """为尚未生成拼音检索键的分类补齐 name_pinyin / name_initials，返回处理条数"""
+        db = get_db()
+        with get_connection() as conn:
+            rows = conn.execute(db.text('SELECT id, name FROM nav_categories WHERE name_pinyin IS NULL')).fetchall()
+            params = []
+            for row in rows:
+                full, initials = pinyin_keys(row[1])
+                if full is None:
+                    return 0
+                params.append({'id': row[0], 'name_pinyin': full, 'name_initials': initials})
+            if params:
+                conn.execute(db.text(
+                    'UPDATE nav_categories SET name_pinyin = :name_pinyin, name_initials = :name_initials WHERE id = :id'
+                ), params)
+                commit(conn)
+            return len(params)
     
+    @staticmethod
+    def create_fts(conn, text):
+        """创建分类名称/描述的 trigram 全文索引（中日韩文字子串检索，由结构迁移调用，可重复执行），不支持时检索回退到 LIKE"""
+        return create_fts_index(conn, text, 'nav_categories', 'nav_categories_trgm',
+                                ['name', 'description'], tokenize='trigram')
+
+    @staticmethod
+    def create_closure(conn, text):
+        """
+        创建分类闭包表 nav_category_closure 及维护触发器，并按当前 parent_id 回填（由结构迁移调用，可重复执行）
+        每对 (祖先, 后代) 一行，depth 为层级差（自身为0）；新增/移动/删除分类时由触发器在同一事务内维护
+        - 移动：先断开子树与原祖先的关联，再整体挂到新父分类的祖先下；新父分类位于自身子树中时拒绝更新
+        - 删除：子分类及其子树保留自身的闭包关系，成为无父分类的子树
+        """
+        conn.execute(text('''
+            CREATE TABLE IF NOT EXISTS nav_category_closure (
+                ancestor_id INTEGER NOT NULL,
+                descendant_id INTEGER NOT NULL,
+                depth INTEGER NOT NULL,
+                PRIMARY KEY (ancestor_id, descendant_id)
+            ) WITHOUT ROWID
+        '''))
+        conn.execute(text('''
+            CREATE INDEX IF NOT EXISTS idx_nav_category_closure_descendant
+            ON nav_category_closure (descendant_id, depth)
+        '''))
+        conn.execute(text('''
+            CREATE TRIGGER IF NOT EXISTS trg_nav_categories_closure_insert AFTER INSERT ON nav_categories
+            BEGIN
+                INSERT INTO nav_category_closure (ancestor_id, descendant_id, depth)
+                SELECT NEW.id, NEW.id, 0
+                UNION ALL
+                SELECT ancestor_id, NEW.id, depth + 1 FROM nav_category_closure WHERE descendant_id = NEW.parent_id;
+            END
+        '''))
+        conn.execute(text('''
+            CREATE TRIGGER IF NOT EXISTS trg_nav_categories_closure_check BEFORE UPDATE OF parent_id ON nav_categories
+            WHEN NEW.parent_id IS NOT NULL AND EXISTS (
+                SELECT 1 FROM nav_category_closure WHERE ancestor_id = NEW.id AND descendant_id = NEW.parent_id
+            )
+            BEGIN
+                SELECT RAISE(ABORT, '不能将分类移动到其子分类下');
+            END
+        '''))
+        conn.execute(text('''
+            CREATE TRIGGER IF NOT EXISTS trg_nav_categories_closure_move AFTER UPDATE OF parent_id ON nav_categories
+            WHEN OLD.parent_id IS NOT NEW.parent_id
+            BEGIN
+                DELETE FROM nav_category_closure
+                WHERE descendant_id IN (SELECT descendant_id FROM nav_category_closure WHERE ancestor_id = NEW.id)
+                  AND ancestor_id NOT IN (SELECT descendant_id FROM nav_category_closure WHERE ancestor_id = NEW.id);
+                INSERT INTO nav_category_closure (ancestor_id, descendant_id, depth)
+                SELECT p.ancestor_id, s.descendant_id, p.depth + s.depth + 1
+                FROM nav_category_closure p, nav_category_closure s
+                WHERE p.descendant_id = NEW.parent_id AND s.ancestor_id = NEW.id;
+            END
+        '''))
+        conn.execute(text('''
+            CREATE TRIGGER IF NOT EXISTS trg_nav_categories_closure_delete AFTER DELETE ON nav_categories
+            BEGIN
+                DELETE FROM nav_category_closure
+                WHERE descendant_id IN (SELECT descendant_id FROM nav_category_closure WHERE ancestor_id = OLD.id)
+                  AND ancestor_id NOT IN (SELECT descendant_id FROM nav_category_closure
+                                          WHERE ancestor_id = OLD.id AND descendant_id != OLD.id);
+            END
+        '''))
+        conn.execute(text('DELETE FROM nav_category_closure'))
+        Category._fill_closure(conn, text)
+
+    @staticmethod
+    def _fill_closure(conn, text, max_depth=16):
+        """按 parent_id 递归生成全部闭包关系（max_depth 防止脏数据中的环导致无限递归）"""
+        conn.execute(text('''
+            INSERT OR IGNORE INTO nav_category_closure (ancestor_id, descendant_id, depth)
+            WITH RECURSIVE closure(ancestor_id, descendant_id, depth) AS (
+                SELECT id, id, 0 FROM nav_categories
+                UNION ALL
+                SELECT closure.ancestor_id, c.id, closure.depth + 1
+                FROM closure
+                JOIN nav_categories c ON c.parent_id = closure.descendant_id
+                WHERE closure.depth < :max_depth
+            )
+            SELECT ancestor_id, descendant_id, depth FROM closure
+        '''), {'max_depth': max_depth})
+
+    @staticmethod
+    def rebuild_closure():
+        """按当前 parent_id 全量重建闭包表（修复用），返回关系行数"""
+        db = get_db()
+        with get_connection() as conn:
+            conn.execute(db.text('DELETE FROM nav_category_closure'))
+            Category._fill_closure(conn, db.text)
+            count = conn.execute(db.text('SELECT COUNT(*) FROM nav_category_closure')).fetchone()[0]
+            commit(conn)
+            return count
+
+    @staticmethod
+    def create_nav_counts(conn, text):
+        """
+        创建分类导航项计数表 nav_category_counts 及维护触发器，并按当前导航项回填（由结构迁移调用，可重复执行）
+        每个分类一行：nav_count 为直属导航项总数，public_nav_count 为其中公开的数量
+        新增/删除导航项、修改导航项所属分类或公开状态时由 navs 上的触发器在同一事务内增减；
+        计数单独成表，不更新 nav_categories，避免触发分类的变更日志与全文索引触发器
+        """
+        conn.execute(text('''
+            CREATE TABLE IF NOT EXISTS nav_category_counts (
+                category_id INTEGER PRIMARY KEY,
+                nav_count INTEGER NOT NULL DEFAULT 0,
+                public_nav_count INTEGER NOT NULL DEFAULT 0
+            )
+        '''))
+        conn.execute(text('''
+            CREATE TRIGGER IF NOT EXISTS trg_navs_counts_insert AFTER INSERT ON navs
+            WHEN NEW.category_id IS NOT NULL
+            BEGIN
+                INSERT INTO nav_category_counts (category_id, nav_count, public_nav_count)
+                VALUES (NEW.category_id, 1, NEW.is_public IS 1)
+                ON CONFLICT (category_id) DO UPDATE SET nav_count = nav_count + 1,
+                    public_nav_count = public_nav_count + excluded.public_nav_count;
+            END
+        '''))
+        conn.execute(text('''
+            CREATE TRIGGER IF NOT EXISTS trg_navs_counts_update AFTER UPDATE OF category_id, is_public ON navs
+            WHEN OLD.category_id IS NOT NEW.category_id OR OLD.is_public IS NOT NEW.is_public
+            BEGIN
+                UPDATE nav_category_counts
+                SET nav_count = nav_count - 1, public_nav_count = public_nav_count - (OLD.is_public IS 1)
+                WHERE category_id = OLD.category_id;
+                INSERT INTO nav_category_counts (category_id, nav_count, public_nav_count)
+                SELECT NEW.category_id, 1, NEW.is_public IS 1 WHERE NEW.category_id IS NOT NULL
+                ON CONFLICT (category_id) DO UPDATE SET nav_count = nav_count + 1,
+                    public_nav_count = public_nav_count + excluded.public_nav_count;
+            END
+        '''))
+        conn.execute(text('''
+            CREATE TRIGGER IF NOT EXISTS trg_navs_counts_delete AFTER DELETE ON navs
+            BEGIN
+                UPDATE nav_category_counts
+                SET nav_count = nav_count - 1, public_nav_count = public_nav_count - (OLD.is_public IS 1)
+                WHERE category_id = OLD.category_id;
+            END
+        '''))
+        conn.execute(text('''
+            CREATE TRIGGER IF NOT EXISTS trg_nav_categories_counts_delete AFTER DELETE ON nav_categories
+            BEGIN
+                DELETE FROM nav_category_counts WHERE category_id = OLD.id;
+            END
+        '''))
+        conn.execute(text('DELETE FROM nav_category_counts'))
+        Category._fill_nav_counts(conn, text)
+
+    @staticmethod
+    def _fill_nav_counts(conn, text):
+        """按 navs 分组统计各分类的导航项数（一次聚合查询，只统计存在的分类）"""
+        conn.execute(text('''
+            INSERT INTO nav_category_counts (category_id, nav_count, public_nav_count)
+            SELECT category_id, COUNT(*), SUM(is_public IS 1) FROM navs
+            WHERE category_id IN (SELECT id FROM nav_categories)
+            GROUP BY category_id
+        '''))
+
+    @staticmethod
+    def rebuild_nav_counts():
+        """按 navs 全量重建分类导航项计数（修复用），返回有导航项的分类数"""
+        db = get_db()
+        with get_connection() as conn:
+            conn.execute(db.text('DELETE FROM nav_category_counts'))
+            Category._fill_nav_counts(conn, db.text)
+            count = conn.execute(db.text('SELECT COUNT(*) FROM nav_category_counts')).fetchone()[0]
+            # 计数随分类列表返回，需使分类树缓存失效
+            commit(conn, catalog_changed=True)
+            return count
+
+    @staticmethod
+    def descendants(category_id, include_self=False):
+        """
+        全部后代分类（一次闭包表查询）
+        返回 list[Category]，按层级由近及远，同层按 sort_order、created_at 排序
+        """
+        db = get_db()
+        with get_connection() as conn:
+            rows = conn.execute(db.text(f'''
+                SELECT c.* FROM nav_category_closure t
+                JOIN nav_categories c ON c.id = t.descendant_id
+                WHERE t.ancestor_id = :id{'' if include_self else ' AND t.depth > 0'}
+                ORDER BY t.depth ASC, c.sort_order ASC, c.created_at ASC
+            '''), {'id': category_id}).fetchall()
+            return Category._from_rows(rows)
+
+    @staticmethod
+    def ancestors(category_id):
+        """
+        全部祖先分类（一次闭包表查询）
+        返回 list[Category]，由父分类到顶级分类
+        """
+        db = get_db()
+        with get_connection() as conn:
+            rows = conn.execute(db.text('''
+                SELECT c.* FROM nav_category_closure t
+                JOIN nav_categories c ON c.id = t.ancestor_id
+                WHERE t.descendant_id = :id AND t.depth > 0
+                ORDER BY t.depth ASC
+            '''), {'id': category_id}).fetchall()
+            return Category._from_rows(rows)
+
+    @staticmethod
+    def subtree_navs(category_id, filters=None):
+        """
+        分类及其全部后代分类下的导航项（一次闭包表查询）
+        支持过滤：is_public
+        返回 list[Nav]，按 sort_order、created_at 排序
+        """
+        from models.navs import Nav
+        db = get_db()
+        with get_connection() as conn:
+            sql = '''
+                SELECT navs.* FROM nav_category_closure t
+                JOIN navs ON navs.category_id = t.descendant_id
+                WHERE t.ancestor_id = :id
+            '''
+            params = {'id': category_id}
+            if filters and 'is_public' in filters:
+                sql += ' AND navs.is_public = :is_public'
+                params['is_public'] = filters['is_public']
+            sql += ' ORDER BY navs.sort_order ASC, navs.created_at ASC, navs.id ASC'
+            rows = conn.execute(db.text(sql), params).fetchall()
+            return Nav._from_rows(rows)
+
+    @staticmethod
+    def move(category_id, parent_id):
+        """
+        移动分类（连同整棵子树）到新的父分类下，parent_id 为空时移动到顶级
+        - 按子树最深的后代校验层级上限
+        - parent_id 更新后闭包表由触发器维护；子树全部分类的 level 由一条 UPDATE 按闭包表层级差重算
+        - 与调用方的其他写入处于同一事务（工作单元），只提交一次
+        参数不合法时抛出 ValueError
+        :return: 分类移动后的 level
+        """
+        db = get_db()
+        with get_connection() as conn:
+            if not conn.execute(db.text('SELECT 1 FROM nav_categories WHERE id = :id'), {'id': category_id}).fetchone():
+                raise ValueError('分类不存在')
+
+            level = 1
+            if parent_id:
+                if parent_id == category_id:
+                    raise ValueError('不能将分类设置为自己的父分类')
+                # 父分类的层级取其闭包关系数（祖先数 + 自身），不依赖存储的 level
+                parent_level = conn.execute(db.text(
+                    'SELECT COUNT(*) FROM nav_category_closure WHERE descendant_id = :id'
+                ), {'id': parent_id}).fetchone()[0]
+                if not parent_level:
+                    raise ValueError('新父分类不存在')
+                if conn.execute(db.text(
+                    'SELECT 1 FROM nav_category_closure WHERE ancestor_id = :id AND descendant_id = :parent_id'
+                ), {'id': category_id, 'parent_id': parent_id}).fetchone():
+                    raise ValueError('不能将分类移动到其子分类下')
+                level = parent_level + 1
+            else:
+                parent_id = None
+
+            height = conn.execute(db.text(
+                'SELECT COALESCE(MAX(depth), 0) FROM nav_category_closure WHERE ancestor_id = :id'
+            ), {'id': category_id}).fetchone()[0]
+            if level + height > Category.MAX_LEVEL:
+                raise ValueError(f'分类层级不能超过{Category.MAX_LEVEL}级')
+
+            conn.execute(db.text('UPDATE nav_categories SET parent_id = :parent_id WHERE id = :id'),
+                         {'id': category_id, 'parent_id': parent_id})
+            conn.execute(db.text('''
+                UPDATE nav_categories
+                SET level = :level + (
+                    SELECT depth FROM nav_category_closure
+                    WHERE ancestor_id = :id AND descendant_id = nav_categories.id
+                )
+                WHERE id IN (SELECT descendant_id FROM nav_category_closure WHERE ancestor_id = :id)
+            '''), {'id': category_id, 'level': level})
+            commit(conn, catalog_changed=True)
+            return level
+
+    @staticmethod
+    def delete_subtree(category_id, cascade=False, dry_run=False):
+        """
+        删除分类及其全部后代分类，连同这些分类下的导航项（同一事务内按集合删除，只提交一次）
+        闭包表由触发器在同一事务内清理；dry_run 时只统计不删除
+        存在子分类且 cascade 为假时抛出 ValueError（按闭包表在同一连接内判断，不依赖分类树缓存）
+        :return: dict{'categories': 删除的分类数, 'navs': 删除的导航项数}
+        """
+        db = get_db()
+        with get_connection() as conn:
+            if not cascade and conn.execute(db.text(
+                'SELECT 1 FROM nav_category_closure WHERE ancestor_id = :id AND depth > 0 LIMIT 1'
+            ), {'id': category_id}).fetchone():
+                raise ValueError('分类下存在子分类，无法删除')
+
+            ids = [row[0] for row in conn.execute(db.text(
+                'SELECT descendant_id FROM nav_category_closure WHERE ancestor_id = :id'
+            ), {'id': category_id})]
+            if not ids:
+                return {'categories': 0, 'navs': 0}
+            params = {f'id_{i}': value for i, value in enumerate(ids)}
+            placeholders = ', '.join(f':{key}' for key in params)
+
+            if dry_run:
+                navs = conn.execute(db.text(
+                    f'SELECT COUNT(*) FROM navs WHERE category_id IN ({placeholders})'
+                ), params).fetchone()[0]
+                return {'categories': len(ids), 'navs': navs}
+
+            navs = conn.execute(db.text(f'DELETE FROM navs WHERE category_id IN ({placeholders})'), params).rowcount
+            categories = conn.execute(db.text(f'DELETE FROM nav_categories WHERE id IN ({placeholders})'), params).rowcount
+            commit(conn, catalog_changed=True)
+            return {'categories': categories, 'navs': navs}
+
+    @staticmethod
+    def search_ids(keyword):
+        """
+        按名称或描述子串匹配分类（不区分大小写），返回匹配的分类ID集合
+        各词均不短于3个字符时走 trigram 索引，否则回退到 LIKE；
+        关键词仅含字母数字时同时按名称拼音全拼/首字母前缀匹配
+        """
+        db = get_db()
+        with get_connection() as conn:
+            query = trigram_query(keyword)
+            if query and fts_table_exists(conn, db.text, 'nav_categories_trgm'):
+                rows = conn.execute(db.text(
+                    'SELECT rowid FROM nav_categories_trgm WHERE nav_categories_trgm MATCH :q'
+                ), {'q': query}).fetchall()
+            else:
+                rows = conn.execute(db.text(
+                    'SELECT id FROM nav_categories WHERE name LIKE :kw OR description LIKE :kw'
+                ), {'kw': f"%{(keyword or '').strip()}%"}).fetchall()
+            ids = {row[0] for row in rows}
+
+            pinyin = pinyin_keyword(keyword)
+            if pinyin:
+                lo, hi = prefix_range(pinyin)
+                rows = conn.execute(db.text('''
+                    SELECT id FROM nav_categories WHERE name_pinyin >= :lo AND name_pinyin < :hi
+                    UNION
+                    SELECT id FROM nav_categories WHERE name_initials >= :lo AND name_initials < :hi
+                '''), {'lo': lo, 'hi': hi}).fetchall()
+                ids.update(row[0] for row in rows)
+            return ids
+
     @staticmethod
     def query():
         """返回查询对象"""
@@ -50,34 +467,28 @@ class Category:
     def get(category_id):
         """根据ID获取分类"""
         db = get_db()
-        with db.engine.connect() as conn:
+        with get_connection() as conn:
             result = conn.execute(
                 db.text('SELECT * FROM nav_categories WHERE id = :id'), 
                 {'id': category_id}
             )
-            row = result.fetchone()
-            if row:
-                return Category(
-                    id=row[0],
-                    parent_id=row[1],
-                    name=row[2],
-                    description=row[3],
-                    sort_order=row[4],
-                    level=row[5],
-                    is_public=bool(row[6]),
-                    created_at=datetime.fromisoformat(row[7]) if row[7] else None
-                )
+            items = Category._from_rows(result.fetchall())
+            if items:
+                return items[0]
         return None
     
     @staticmethod
-    def get_all(filters=None, page=None, size=None, sort='sort_order'):
-        """获取所有分类，支持分页和排序"""
+    def get_all(filters=None, page=None, size=None, sort='sort_order', with_total=TOTAL_EXACT, with_counts=False):
+        """获取所有分类，支持分页和排序
+        with_total: exact 与分页查询同一条语句返回精确总数；estimated 优先使用缓存的同条件总数；
+                    none 不统计总数（total 为 None）
+        with_counts: 同一条语句关联计数表，附加 nav_count / public_nav_count
+        """
         db = get_db()
-        with db.engine.connect() as conn:
-            # 构建基础查询
-            sql = 'SELECT * FROM nav_categories'
-            count_sql = 'SELECT COUNT(*) FROM nav_categories'
+        with get_connection() as conn:
+            version = get_catalog_version()
             params = {}
+            where_clause = ''
             
             # 构建过滤条件
             if filters:
@@ -97,12 +508,18 @@ class Category:
                 
                 if conditions:
                     where_clause = ' WHERE ' + ' AND '.join(conditions)
-                    sql += where_clause
-                    count_sql += where_clause
             
-            # 获取总数
-            total_result = conn.execute(db.text(count_sql), params)
-            total = total_result.fetchone()[0]
+            # 总数：窗口函数与分页查询同一条语句计算，或使用缓存估算
+            key = count_key('nav_categories', where_clause, params)
+            total = filter_counts.get(key) if with_total == TOTAL_ESTIMATED else None
+            count_in_query = with_total == TOTAL_EXACT or (with_total == TOTAL_ESTIMATED and total is None)
+            columns = 'nav_categories.*'
+            from_clause = 'nav_categories'
+            if with_counts:
+                columns += (', COALESCE(counts.nav_count, 0) AS nav_count'
+                            ', COALESCE(counts.public_nav_count, 0) AS public_nav_count')
+                from_clause += ' LEFT JOIN nav_category_counts counts ON counts.category_id = nav_categories.id'
+            sql = f'SELECT {columns}{", COUNT(*) OVER ()" if count_in_query else ""} FROM {from_clause}{where_clause}'
             
             # 构建排序
             if sort == 'created_at':
@@ -111,31 +528,21 @@ class Category:
                 sql += ' ORDER BY sort_order ASC, created_at ASC'
             
             # 添加分页
+            offset = 0
             if page is not None and size is not None:
                 offset = (page - 1) * size
                 sql += f' LIMIT {size} OFFSET {offset}'
             
-            result = conn.execute(db.text(sql), params)
-            categories = []
-            for row in result:
-                categories.append(Category(
-                    id=row[0],
-                    parent_id=row[1],
-                    name=row[2],
-                    description=row[3],
-                    sort_order=row[4],
-                    level=row[5],
-                    is_public=bool(row[6]),
-                    created_at=datetime.fromisoformat(row[7]) if row[7] else None
-                ))
-            
-            return categories, total
+            result = conn.execute(db.text(sql), params).fetchall()
+            if count_in_query:
+                total = paged_total(conn, db.text, 'nav_categories', where_clause, params, result, offset, key, version)
+            return Category._from_rows(result), total
     
     @staticmethod
     def get_all_children(filters=None, sort='sort_order'):
         """获取所有子分类（parent_id 非空），支持 is_public 过滤，返回 (list, total)"""
         db = get_db()
-        with db.engine.connect() as conn:
+        with get_connection() as conn:
             sql = 'SELECT * FROM nav_categories WHERE parent_id IS NOT NULL'
             count_sql = 'SELECT COUNT(*) FROM nav_categories WHERE parent_id IS NOT NULL'
             params = {}
@@ -153,55 +560,38 @@ class Category:
                 sql += ' ORDER BY sort_order ASC, created_at ASC'
 
             total = conn.execute(db.text(count_sql), params).fetchone()[0]
-            result = conn.execute(db.text(sql), params)
-
-            items = []
-            for row in result:
-                items.append(Category(
-                    id=row[0],
-                    parent_id=row[1],
-                    name=row[2],
-                    description=row[3],
-                    sort_order=row[4],
-                    level=row[5],
-                    is_public=bool(row[6]),
-                    created_at=datetime.fromisoformat(row[7]) if row[7] else None
-                ))
-            return items, total
+            rows = conn.execute(db.text(sql), params).fetchall()
+            return Category._from_rows(rows), total
     
     @staticmethod
     def get_children(parent_id):
-        """获取子分类"""
-        children, _ = Category.get_all({'parent_id': parent_id})
-        return children
+        """获取子分类（读取进程内分类树缓存，返回的实例只读）"""
+        from utils.category_tree import get_category_tree
+        return get_category_tree().children(parent_id)
     
+    @staticmethod
+    def get_tree_nodes():
+        """
+        获取从顶级分类可达的全部分类（读取进程内分类树缓存，返回的实例只读）
+        每个分类附加：
+        - depth: 所在深度（顶级为1）
+        - visible: 匿名可见性（顶级恒为1；其余需自身及所有非顶级祖先均公开）
+        - nav_count / public_nav_count: 直属导航项数 / 其中公开导航项数
+        返回 list[Category]，按 sort_order、created_at 排序
+        """
+        from utils.category_tree import get_category_tree
+        return list(get_category_tree().reachable)
+
     @staticmethod
     def get_tree():
-        """获取分类树结构"""
-        # 获取所有分类
-        all_categories, _ = Category.get_all()
-        
-        # 构建分类字典
-        category_dict = {cat.id: cat for cat in all_categories}
-        
-        # 构建树结构
-        tree = []
-        for category in all_categories:
-            if category.parent_id is None:
-                # 根分类
-                tree.append(category)
-            else:
-                # 子分类，添加到父分类的children中
-                parent = category_dict.get(category.parent_id)
-                if parent:
-                    if not hasattr(parent, 'children'):
-                        parent.children = []
-                    parent.children.append(category)
-        
-        return tree
+        """获取分类树结构：顶级分类列表，各分类的 children 为其子分类（读取进程内分类树缓存，返回的实例只读）"""
+        from utils.category_tree import get_category_tree
+        return get_category_tree().children(None)
     
-    def to_dict(self, include_children=False):
-        """转换为字典"""
+    def to_dict(self, include_children=False, include_counts=False):
+        """转换为字典
+        include_counts: 附加 nav_count / public_nav_count（实例未带计数时为0）
+        """
         data = {
             'id': self.id,
             'parent_id': self.parent_id,
@@ -210,12 +600,17 @@ class Category:
             'sort_order': self.sort_order,
             'level': self.level,
             'is_public': self.is_public,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None
+            'created_at': self.created_at_text
         }
         
+        if include_counts:
+            data['nav_count'] = getattr(self, 'nav_count', 0)
+            data['public_nav_count'] = getattr(self, 'public_nav_count', 0)
+        
         if include_children:
             if hasattr(self, 'children'):
-                data['children'] = [child.to_dict(include_children=True) for child in self.children]
+                data['children'] = [child.to_dict(include_children=True, include_counts=include_counts)
+                                    for child in self.children]
             else:
                 data['children'] = []
         
@@ -224,14 +619,16 @@ class Category:
     def save(self):
         """保存分类到数据库"""
         db = get_db()
-        with db.engine.connect() as conn:
+        name_pinyin, name_initials = pinyin_keys(self.name)
+        with get_connection() as conn:
             if self.id:
                 # 更新
                 conn.execute(db.text('''
                     UPDATE nav_categories 
                     SET name = :name, description = :description, 
                         sort_order = :sort_order, level = :level, 
-                        is_public = :is_public, parent_id = :parent_id
+                        is_public = :is_public, parent_id = :parent_id,
+                        name_pinyin = :name_pinyin, name_initials = :name_initials
                     WHERE id = :id
                 '''), {
                     'id': self.id,
@@ -240,13 +637,17 @@ class Category:
                     'sort_order': self.sort_order,
                     'level': self.level,
                     'is_public': self.is_public,
-                    'parent_id': self.parent_id
+                    'parent_id': self.parent_id,
+                    'name_pinyin': name_pinyin,
+                    'name_initials': name_initials
                 })
             else:
                 # 新增
                 result = conn.execute(db.text('''
-                    INSERT INTO nav_categories (parent_id, name, description, sort_order, level, is_public, created_at) 
-                    VALUES (:parent_id, :name, :description, :sort_order, :level, :is_public, :created_at)
+                    INSERT INTO nav_categories (parent_id, name, description, sort_order, level, is_public, created_at,
+                                                name_pinyin, name_initials)
+                    VALUES (:parent_id, :name, :description, :sort_order, :level, :is_public, :created_at,
+                            :name_pinyin, :name_initials)
                 '''), {
                     'parent_id': self.parent_id,
                     'name': self.name,
@@ -254,10 +655,12 @@ class Category:
                     'sort_order': self.sort_order,
                     'level': self.level,
                     'is_public': self.is_public,
-                    'created_at': self.created_at
+                    'created_at': Category.created_at.epoch(self),
+                    'name_pinyin': name_pinyin,
+                    'name_initials': name_initials
                 })
                 self.id = result.lastrowid
-            conn.commit()
+            commit(conn, catalog_changed=True)
     
     def delete(self):
         """删除分类"""
@@ -265,7 +668,7 @@ class Category:
             return False
         
         db = get_db()
-        with db.engine.connect() as conn:
+        with get_connection() as conn:
             # 检查是否有子分类
             children = conn.execute(
                 db.text('SELECT COUNT(*) FROM nav_categories WHERE parent_id = :id'),
@@ -280,35 +683,55 @@ class Category:
                 db.text('DELETE FROM nav_categories WHERE id = :id'),
                 {'id': self.id}
             )
-            conn.commit()
+            commit(conn, catalog_changed=True)
             return True
     
     @staticmethod
     def find_by_name(name):
-        """根据分类名称查找分类"""
+        """根据分类名称查找分类（不区分大小写，走 LOWER(name) 表达式索引）"""
         if not name:
             return None
         
         db = get_db()
-        with db.engine.connect() as conn:
+        with get_connection() as conn:
             result = conn.execute(
                 db.text('SELECT * FROM nav_categories WHERE LOWER(name) = LOWER(:name)'), 
                 {'name': name}
             )
-            row = result.fetchone()
-            if row:
-                return Category(
-                    id=row[0],
-                    parent_id=row[1],
-                    name=row[2],
-                    description=row[3],
-                    sort_order=row[4],
-                    level=row[5],
-                    is_public=bool(row[6]),
-                    created_at=datetime.fromisoformat(row[7]) if row[7] else None
-                )
+            items = Category._from_rows(result.fetchall())
+            if items:
+                return items[0]
         return None
     
+    @staticmethod
+    def names_to_ids(names, chunk_size=500):
+        """
+        批量按名称解析分类ID（不区分大小写，走 LOWER(name) 表达式索引）
+        每个不同名称只查找一次，每 chunk_size 个名称一条查询；同名分类取ID最小者，与 find_by_name 一致
+        :return: dict{名称: 分类ID}，未找到的名称不在结果中
+        """
+        distinct = list(dict.fromkeys(name for name in names if name))
+        result = {}
+        if not distinct:
+            return result
+        db = get_db()
+        with get_connection() as conn:
+            for start in range(0, len(distinct), chunk_size):
+                chunk = distinct[start:start + chunk_size]
+                params = {f'name_{i}': name for i, name in enumerate(chunk)}
+                values = ', '.join(f'(:{key})' for key in params)
+                rows = conn.execute(db.text(f'''
+                    WITH input(name) AS (VALUES {values})
+                    SELECT input.name, (
+                        SELECT id FROM nav_categories
+                        WHERE LOWER(nav_categories.name) = LOWER(input.name)
+                        ORDER BY id LIMIT 1
+                    )
+                    FROM input
+                '''), params)
+                result.update((name, category_id) for name, category_id in rows if category_id is not None)
+        return result
+
     def __repr__(self):
         return f'<Category {self.name}>'
 
@@ -325,7 +748,7 @@ class CategoryQuery:
     
     def all(self):
         """获取所有结果"""
-        categories, _ = Category.get_all(self.filters)
+        categories, _ = Category.get_all(self.filters, with_total=TOTAL_NONE)
         return categories
     
     def first(self):
@@ -1,4 +1,16 @@
 from datetime import datetime
+import base64
+import json
+
+from utils.catalog import get_catalog_version
+from utils.counts import TOTAL_ESTIMATED, TOTAL_EXACT, TOTAL_NONE, count_key, filter_counts, paged_total
+from utils.db import get_connection, commit
+from utils.rows import row_getter
+from utils.search import (
+    bigram_keys, create_fts_index, fts_table_exists, pinyin_keys, pinyin_keyword, prefix_range,
+    substring_queries, word_query
+)
+from utils.timestamps import EPOCH_COLUMN_DEFINITION, LazyTimestamp
 
 # 延迟导入避免循环依赖
 
@@ -7,13 +19,89 @@ def get_db():
     return current_app.extensions['sqlalchemy']
 
 
+def _encode_cursor(sort, key):
+    """将排序键编码为不透明游标"""
+    raw = json.dumps({'s': sort, 'k': key}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor, sort):
+    """解析游标，排序方式不一致或格式错误时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+        key = data['k']
+    except Exception:
+        raise ValueError('无效的游标')
+    expected = 2 if sort == 'created_at' else 3
+    if data.get('s') != sort or not isinstance(key, list) or len(key) != expected:
+        raise ValueError('游标与排序方式不匹配')
+    # created_at 为整数秒（时间字符串格式的旧游标不再有效）
+    if not all(isinstance(value, int) for value in key[-2:]):
+        raise ValueError('无效的游标')
+    return key
+
+
+# 批量写入每条语句处理的行数（多行 VALUES 每行12个参数，远低于 SQLite 单语句参数上限）
+BULK_CHUNK_SIZE = 500
+
+# 新增导航项写入的列
+_INSERT_COLUMNS = ('category_id', 'title', 'url', 'description', 'icon', 'sort_order', 'is_public', 'created_at',
+                   'title_pinyin', 'title_initials', 'title_bigrams', 'description_bigrams')
+_INSERT_SQL = f'INSERT INTO navs ({", ".join(_INSERT_COLUMNS)}) VALUES '
+
+
+def _insert_values(suffix=''):
+    """VALUES 占位符组，多行插入时以 suffix 区分各行参数名"""
+    return '(' + ', '.join(f':{column}{suffix}' for column in _INSERT_COLUMNS) + ')'
+
+
+_UPDATE_SQL = '''
+    UPDATE navs
+    SET category_id = :category_id,
+        title = :title,
+        url = :url,
+        description = :description,
+        icon = :icon,
+        sort_order = :sort_order,
+        is_public = :is_public,
+        title_pinyin = :title_pinyin,
+        title_initials = :title_initials,
+        title_bigrams = :title_bigrams,
+        description_bigrams = :description_bigrams
+    WHERE id = :id
+'''
+
+
+def _error_message(e):
+    """数据库异常取驱动原始信息（不含SQL语句和参数）"""
+    return str(getattr(e, 'orig', None) or e)
+
+
+def _chunks(items, size=BULK_CHUNK_SIZE):
+    """按 size 切分为连续片段，返回 (起始下标, 片段)"""
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+
 class Nav:
     """
     导航菜单模型（使用原生SQL，保持与 Category 一致的风格）
     表名：navs
-    字段：id, category_id, title, url, description, icon, sort_order, is_public, created_at
+    字段：id, category_id, title, url, description, icon, sort_order, is_public, created_at,
+          title_pinyin, title_initials（标题拼音全拼/首字母检索键，保存时生成）,
+          title_bigrams, description_bigrams（标题/描述 bigram 检索键，保存时生成）
+    实例使用 __slots__，查询结果按列名映射；created_at 以整数秒（epoch）存储，保留数据库原始值，访问时才解析
     """
 
+    __slots__ = ('id', 'category_id', 'title', 'url', 'description', 'icon', 'sort_order', 'is_public',
+                 '_created_at', '_created_at_raw')
+
+    # 构建实例所需的列（按列名取值，与查询列顺序无关）
+    COLUMNS = ('id', 'category_id', 'title', 'url', 'description', 'icon', 'sort_order', 'is_public', 'created_at')
+
+    created_at = LazyTimestamp()
+
     def __init__(self, **kwargs):
         self.id = kwargs.get('id')
         self.category_id = kwargs.get('category_id')
@@ -25,12 +113,38 @@ class Nav:
         self.is_public = kwargs.get('is_public', True)
         self.created_at = kwargs.get('created_at', datetime.utcnow())
 
+    @staticmethod
+    def _from_rows(rows):
+        """将查询结果行转换为 Nav 列表（绕过 __init__，不解析时间字段）"""
+        if not rows:
+            return []
+        getter = row_getter(rows[0]._fields, Nav.COLUMNS)
+        items = []
+        for row in rows:
+            nav = Nav.__new__(Nav)
+            (nav.id, nav.category_id, nav.title, nav.url, nav.description, nav.icon,
+             nav.sort_order, is_public, nav._created_at_raw) = getter(row)
+            nav.is_public = bool(is_public)
+            nav._created_at = None
+            items.append(nav)
+        return items
+
+    @property
+    def created_at_text(self):
+        """created_at 的 'YYYY-MM-DD HH:MM:SS' 格式字符串（无需解析为 datetime）"""
+        return Nav.created_at.text(self)
+
+    @property
+    def created_at_epoch(self):
+        """created_at 的整数秒（epoch），用于排序"""
+        return Nav.created_at.epoch(self)
+
     @staticmethod
     def create_table():
         """创建导航菜单表（如不存在）"""
         db = get_db()
-        with db.engine.connect() as conn:
-            conn.execute(db.text('''
+        with get_connection() as conn:
+            conn.execute(db.text(f'''
                 CREATE TABLE IF NOT EXISTS navs (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     category_id INTEGER NOT NULL,
@@ -40,44 +154,266 @@ class Nav:
                     icon TEXT,
                     sort_order INTEGER DEFAULT 0,
                     is_public BOOLEAN DEFAULT TRUE,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    created_at {EPOCH_COLUMN_DEFINITION},
                     FOREIGN KEY (category_id) REFERENCES nav_categories(id)
                 )
             '''))
-            conn.commit()
+            commit(conn)
+
+    @staticmethod
+    def backfill_pinyin():
+        """为尚未生成拼音检索键的导航项补齐 title_pinyin / title_initials，返回处理条数"""
+        db = get_db()
+        with get_connection() as conn:
+            rows = conn.execute(db.text('SELECT id, title FROM navs WHERE title_pinyin IS NULL')).fetchall()
+            params = []
+            for row in rows:
+                full, initials = pinyin_keys(row[1])
+                if full is None:
+                    return 0
+                params.append({'id': row[0], 'title_pinyin': full, 'title_initials': initials})
+            if params:
+                conn.execute(db.text(
+                    'UPDATE navs SET title_pinyin = :title_pinyin, title_initials = :title_initials WHERE id = :id'
+                ), params)
+                commit(conn)
+            return len(params)
 
     @staticmethod
     def get(nav_id: int):
         """根据ID获取导航项"""
         db = get_db()
-        with db.engine.connect() as conn:
-            res = conn.execute(db.text('SELECT * FROM navs WHERE id = :id'), {'id': nav_id})
-            row = res.fetchone()
-            if not row:
-                return None
-            return Nav(
-                id=row[0],
-                category_id=row[1],
-                title=row[2],
-                url=row[3],
-                description=row[4],
-                icon=row[5],
-                sort_order=row[6],
-                is_public=bool(row[7]),
-                created_at=datetime.fromisoformat(row[8]) if row[8] else None
-            )
+        with get_connection() as conn:
+            rows = conn.execute(db.text('SELECT * FROM navs WHERE id = :id'), {'id': nav_id}).fetchall()
+            items = Nav._from_rows(rows)
+            return items[0] if items else None
+
+    @staticmethod
+    def create_fts(conn, text):
+        """
+        创建全文索引（FTS5 外部内容表），由触发器与 navs 保持同步，首次创建时回填（由结构迁移调用，可重复执行）：
+        - navs_fts：unicode61 分词，英文等按词前缀检索，BM25 排序
+        - navs_trgm：trigram 分词，不短于3个字符的子串检索
+        - navs_bigram：unicode61 分词索引 bigram 检索键（title_bigrams / description_bigrams），两个字符的子串检索
+        SQLite 未编译 FTS5 / 不支持 trigram 时跳过，对应检索回退到 LIKE
+        返回 unicode61 索引是否可用
+        """
+        enabled = create_fts_index(conn, text, 'navs', 'navs_fts', ['title', 'description'])
+        create_fts_index(conn, text, 'navs', 'navs_trgm', ['title', 'description'], tokenize='trigram')
+        create_fts_index(conn, text, 'navs', 'navs_bigram', ['title_bigrams', 'description_bigrams'])
+        return enabled
+
+    @staticmethod
+    def fts_enabled(fts_table='navs_fts'):
+        """全文索引是否可用（进程内缓存检测结果）"""
+        db = get_db()
+        with get_connection() as conn:
+            return fts_table_exists(conn, db.text, fts_table)
+
+    @staticmethod
+    def _search_conditions(filters):
+        """
+        构建检索条件，返回 (from_clause, conditions, params, rank)
+        rank 为相关度排序表达式（越小越相关），未走全文索引时为 None
+        关键词检索（各来源走各自的索引取ID，任一命中即可）：
+        - 各词均只含字母数字（不含中日韩文字、标点）：navs_fts 词前缀匹配，相关度按其 BM25 计算；
+          含标点的词（如 c++、node.js）会被分词器拆开、命中范围大于 LIKE，不走 navs_fts
+        - 子串匹配（与 LIKE 语义一致，如 hub 命中 GitHub、git 命中“码云Gitee”这类 unicode61 视为一个词的
+          中英混排标题）：不短于3个字符的词走 navs_trgm，两个字符的词走 navs_bigram，各词取交集；
+          含单个字符的词或索引不可用时回退到 LIKE
+        - 仅含字母数字时同时按标题拼音全拼/首字母前缀匹配
+        只有一个全文索引来源时直接 JOIN 该索引；多个来源时取ID并集，只由子串/拼音命中的排在后面
+        """
+        params = {}
+        conditions = []
+        from_clause = 'navs'
+        rank = None
+        if filters:
+            if 'is_public' in filters:
+                conditions.append('navs.is_public = :is_public')
+                params['is_public'] = filters['is_public']
+            if 'category_id' in filters and filters['category_id'] is not None:
+                conditions.append('navs.category_id = :category_id')
+                params['category_id'] = filters['category_id']
+            if 'category_ids' in filters:
+                placeholders = []
+                for i, value in enumerate(filters['category_ids']):
+                    params[f'category_ids_{i}'] = value
+                    placeholders.append(f':category_ids_{i}')
+                conditions.append(f'navs.category_id IN ({", ".join(placeholders)})' if placeholders else '0')
+            if 'keyword' in filters and filters['keyword']:
+                keyword = filters['keyword']
+                # 全文索引来源：各来源为 [(索引表, 参数名, 查询)]，同一来源内各索引取交集，第一个索引用于计算相关度
+                sources = []
+                words = word_query(keyword)
+                if words and Nav.fts_enabled('navs_fts'):
+                    sources.append([('navs_fts', 'fts', words)])
+                substring = []
+                for fts_table, name, query in zip(('navs_trgm', 'navs_bigram'), ('trgm', 'bigram'),
+                                                  substring_queries(keyword) or (None, None)):
+                    if query:
+                        substring.append((fts_table, name, query) if Nav.fts_enabled(fts_table) else None)
+                substring_indexed = bool(substring) and None not in substring
+                if substring_indexed:
+                    sources.append(substring)
+                pinyin = pinyin_keyword(keyword)
+
+                if len(sources) == 1 and len(sources[0]) == 1 and not pinyin and substring_indexed:
+                    fts_table, name, query = sources[0][0]
+                    from_clause = f'navs JOIN {fts_table} ON {fts_table}.rowid = navs.id'
+                    conditions.append(f'{fts_table} MATCH :{name}')
+                    params[name] = query
+                    rank = f'bm25({fts_table}, 10.0, 1.0)'
+                elif sources or pinyin:
+                    subqueries = []
+                    for source in sources:
+                        fts_table, name, query = source[0]
+                        subquery = f'SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH :{name}'
+                        for other_table, other_name, _ in source[1:]:
+                            subquery += (f' AND rowid IN (SELECT rowid FROM {other_table} '
+                                         f'WHERE {other_table} MATCH :{other_name})')
+                        subqueries.append(subquery)
+                        params.update({name: query for _, name, query in source})
+                    if sources:
+                        fts_table, name, _ = sources[0][0]
+                        rank = (f'COALESCE((SELECT bm25({fts_table}, 10.0, 1.0) FROM {fts_table} '
+                                f'WHERE {fts_table} MATCH :{name} AND rowid = navs.id), 0)')
+                    if not substring_indexed:
+                        subqueries.append('SELECT id FROM navs WHERE title LIKE :kw OR description LIKE :kw')
+                        params['kw'] = f"%{keyword}%"
+                    if pinyin:
+                        params['py_lo'], params['py_hi'] = prefix_range(pinyin)
+                        subqueries.append('SELECT id FROM navs WHERE title_pinyin >= :py_lo AND title_pinyin < :py_hi')
+                        subqueries.append('SELECT id FROM navs WHERE title_initials >= :py_lo AND title_initials < :py_hi')
+                    conditions.append(f'navs.id IN ({" UNION ".join(subqueries)})')
+                else:
+                    conditions.append('(navs.title LIKE :kw OR navs.description LIKE :kw)')
+                    params['kw'] = f"%{keyword}%"
+        return from_clause, conditions, params, rank
 
     @staticmethod
-    def search(filters=None, page: int = 1, size: int = 10, sort: str = 'sort_order'):
+    def search(filters=None, page: int = 1, size: int = 10, sort: str = 'sort_order',
+               with_total: str = TOTAL_EXACT):
         """
         分页检索导航项
-        支持过滤：is_public, keyword(匹配title/description), category_id
+        支持过滤：is_public, keyword(匹配title/description及标题拼音), category_id, category_ids
+        sort=relevance 且关键词走全文索引时按 BM25 相关度排序（标题权重高于描述）
+        with_total: exact 与分页查询同一条语句返回精确总数；estimated 优先使用缓存的同条件总数；
+                    none 不统计总数（total 为 None）
         返回 (list[Nav], total)
         """
         db = get_db()
-        with db.engine.connect() as conn:
+        with get_connection() as conn:
+            version = get_catalog_version()
+            from_clause, conditions, params, rank = Nav._search_conditions(filters)
+            where_clause = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+            key = count_key(from_clause, where_clause, params)
+
+            total = filter_counts.get(key) if with_total == TOTAL_ESTIMATED else None
+            count_in_query = with_total == TOTAL_EXACT or (with_total == TOTAL_ESTIMATED and total is None)
+            # 总数由窗口函数在同一条语句中计算（LIMIT 之前求值），不再单独执行 COUNT 查询
+            sql = f'SELECT navs.*{", COUNT(*) OVER ()" if count_in_query else ""} FROM {from_clause}{where_clause}'
+
+            if sort == 'relevance' and rank and count_in_query:
+                # FTS5 辅助函数（bm25）不能与窗口函数位于同一层查询，先在子查询中算出相关度
+                sql = (f'SELECT *, COUNT(*) OVER () FROM ('
+                       f'SELECT navs.*, {rank} AS search_rank FROM {from_clause}{where_clause}'
+                       f') ORDER BY search_rank, sort_order ASC, id ASC')
+            elif sort == 'relevance' and rank:
+                sql += f' ORDER BY {rank}, navs.sort_order ASC, navs.id ASC'
+            elif sort == 'created_at':
+                sql += ' ORDER BY created_at DESC'
+            elif sort == 'home':
+                # 主页排序：sort_order 升序，相同 sort_order 按 created_at 降序
+                sql += ' ORDER BY sort_order ASC, created_at DESC, id ASC'
+            else:
+                sql += ' ORDER BY sort_order ASC, created_at ASC'
+
+            offset = 0
+            if page and size:
+                offset = (page - 1) * size
+                sql += f' LIMIT {size} OFFSET {offset}'
+
+            rows = conn.execute(db.text(sql), params).fetchall()
+            if count_in_query:
+                total = paged_total(conn, db.text, from_clause, where_clause, params, rows, offset, key, version)
+            items = Nav._from_rows(rows)
+            return items, total
+
+    @staticmethod
+    def search_after(filters=None, cursor=None, size: int = 10, sort: str = 'sort_order',
+                     with_total: str = TOTAL_EXACT):
+        """
+        游标（keyset）分页检索导航项，深分页不再随 OFFSET 线性变慢
+        排序键：sort_order 模式为 (sort_order, created_at, id) 升序；created_at 模式为 (created_at, id) 降序
+        支持过滤：同 search；with_total 同 search（后续页的精确总数需单独 COUNT，翻页时建议使用 estimated）
+        cursor 为上一页返回的 next_cursor，None 表示第一页；游标无效时抛出 ValueError
+        返回 (list[Nav], total, next_cursor)，没有下一页时 next_cursor 为 None
+        """
+        db = get_db()
+        with get_connection() as conn:
+            version = get_catalog_version()
+            from_clause, conditions, params, _ = Nav._search_conditions(filters)
+            where_clause = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+            count_cache_key = count_key(from_clause, where_clause, params)
+
+            total = filter_counts.get(count_cache_key) if with_total == TOTAL_ESTIMATED else None
+            need_total = with_total != TOTAL_NONE and total is None
+            # 首页可由窗口函数在同一条语句中计算总数；后续页带游标条件，需单独 COUNT
+            count_in_query = need_total and not cursor
+            if need_total and cursor:
+                total = conn.execute(db.text(f'SELECT COUNT(*) FROM {from_clause}{where_clause}'), params).fetchone()[0]
+                filter_counts.set(count_cache_key, total, version)
+
+            if sort == 'created_at':
+                key_columns = "navs.created_at, navs.id"
+                order_by = 'navs.created_at DESC, navs.id DESC'
+                compare = '<'
+            else:
+                sort = 'sort_order'
+                key_columns = "navs.sort_order, navs.created_at, navs.id"
+                order_by = 'navs.sort_order ASC, navs.created_at ASC, navs.id ASC'
+                compare = '>'
+
+            if cursor:
+                key = _decode_cursor(cursor, sort)
+                placeholders = []
+                for i, value in enumerate(key):
+                    params[f'cursor_{i}'] = value
+                    placeholders.append(f':cursor_{i}')
+                conditions.append(f'({key_columns}) {compare} ({", ".join(placeholders)})')
+
+            sql = f'SELECT navs.*{", COUNT(*) OVER ()" if count_in_query else ""} FROM {from_clause}'
+            if conditions:
+                sql += ' WHERE ' + ' AND '.join(conditions)
+            # 多取一条用于判断是否存在下一页
+            sql += f' ORDER BY {order_by} LIMIT {int(size) + 1}'
+
+            rows = conn.execute(db.text(sql), params).fetchall()
+            if count_in_query:
+                total = paged_total(conn, db.text, from_clause, where_clause, params, rows, 0, count_cache_key, version)
+            has_more = len(rows) > size
+            items = Nav._from_rows(rows[:size])
+            next_cursor = None
+            if has_more:
+                last = items[-1]
+                # 游标使用数据库中的原始整数秒，与 SQL 比较的值保持一致
+                if sort == 'created_at':
+                    next_cursor = _encode_cursor(sort, [last._created_at_raw, last.id])
+                else:
+                    next_cursor = _encode_cursor(sort, [last.sort_order, last._created_at_raw, last.id])
+            return items, total, next_cursor
+
+    @staticmethod
+    def get_all(filters=None, sort: str = 'sort_order'):
+        """
+        一次性获取全部导航项（不分页、不统计总数）
+        支持过滤：is_public, ids, category_ids
+        返回 list[Nav]
+        """
+        db = get_db()
+        with get_connection() as conn:
             sql = 'SELECT * FROM navs'
-            count_sql = 'SELECT COUNT(*) FROM navs'
             params = {}
             conditions = []
 
@@ -85,44 +421,27 @@ class Nav:
                 if 'is_public' in filters:
                     conditions.append('is_public = :is_public')
                     params['is_public'] = filters['is_public']
-                if 'category_id' in filters and filters['category_id'] is not None:
-                    conditions.append('category_id = :category_id')
-                    params['category_id'] = filters['category_id']
-                if 'keyword' in filters and filters['keyword']:
-                    conditions.append('(title LIKE :kw OR description LIKE :kw)')
-                    params['kw'] = f"%{filters['keyword']}%"
+                for field, column in (('ids', 'id'), ('category_ids', 'category_id')):
+                    if field in filters:
+                        values = list(filters[field])
+                        if not values:
+                            return []
+                        placeholders = []
+                        for i, value in enumerate(values):
+                            params[f'{field}_{i}'] = value
+                            placeholders.append(f':{field}_{i}')
+                        conditions.append(f'{column} IN ({", ".join(placeholders)})')
 
             if conditions:
-                where_clause = ' WHERE ' + ' AND '.join(conditions)
-                sql += where_clause
-                count_sql += where_clause
-
-            total = conn.execute(db.text(count_sql), params).fetchone()[0]
+                sql += ' WHERE ' + ' AND '.join(conditions)
 
             if sort == 'created_at':
                 sql += ' ORDER BY created_at DESC'
             else:
                 sql += ' ORDER BY sort_order ASC, created_at ASC'
 
-            if page and size:
-                offset = (page - 1) * size
-                sql += f' LIMIT {size} OFFSET {offset}'
-
-            rows = conn.execute(db.text(sql), params)
-            items = []
-            for row in rows:
-                items.append(Nav(
-                    id=row[0],
-                    category_id=row[1],
-                    title=row[2],
-                    url=row[3],
-                    description=row[4],
-                    icon=row[5],
-                    sort_order=row[6],
-                    is_public=bool(row[7]),
-                    created_at=datetime.fromisoformat(row[8]) if row[8] else None
-                ))
-            return items, total
+            rows = conn.execute(db.text(sql), params).fetchall()
+            return Nav._from_rows(rows)
 
     def to_dict(self):
         return {
@@ -135,50 +454,39 @@ class Nav:
             'sort_order': self.sort_order,
             # 文档要求以 0/1 返回
             'is_public': int(self.is_public) if self.is_public is not None else None,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None
+            'created_at': self.created_at_text
+        }
+
+    def _write_params(self):
+        """INSERT/UPDATE 语句参数（含标题拼音检索键、标题/描述 bigram 检索键）"""
+        title_pinyin, title_initials = pinyin_keys(self.title)
+        return {
+            'id': self.id,
+            'category_id': self.category_id,
+            'title': self.title,
+            'url': self.url,
+            'description': self.description,
+            'icon': self.icon,
+            'sort_order': self.sort_order,
+            'is_public': self.is_public,
+            'created_at': Nav.created_at.epoch(self),
+            'title_pinyin': title_pinyin,
+            'title_initials': title_initials,
+            'title_bigrams': bigram_keys(self.title),
+            'description_bigrams': bigram_keys(self.description)
         }
 
     def save(self):
         """新增或更新"""
         db = get_db()
-        with db.engine.connect() as conn:
+        params = self._write_params()
+        with get_connection() as conn:
             if self.id:
-                conn.execute(db.text('''
-                    UPDATE navs
-                    SET category_id = :category_id,
-                        title = :title,
-                        url = :url,
-                        description = :description,
-                        icon = :icon,
-                        sort_order = :sort_order,
-                        is_public = :is_public
-                    WHERE id = :id
-                '''), {
-                    'id': self.id,
-                    'category_id': self.category_id,
-                    'title': self.title,
-                    'url': self.url,
-                    'description': self.description,
-                    'icon': self.icon,
-                    'sort_order': self.sort_order,
-                    'is_public': self.is_public,
-                })
+                conn.execute(db.text(_UPDATE_SQL), params)
             else:
-                result = conn.execute(db.text('''
-                    INSERT INTO navs (category_id, title, url, description, icon, sort_order, is_public, created_at)
-                    VALUES (:category_id, :title, :url, :description, :icon, :sort_order, :is_public, :created_at)
-                '''), {
-                    'category_id': self.category_id,
-                    'title': self.title,
-                    'url': self.url,
-                    'description': self.description,
-                    'icon': self.icon,
-                    'sort_order': self.sort_order,
-                    'is_public': self.is_public,
-                    'created_at': self.created_at
-                })
+                result = conn.execute(db.text(_INSERT_SQL + _insert_values()), params)
                 self.id = result.lastrowid
-            conn.commit()
+            commit(conn, catalog_changed=True)
             return self
 
     def delete(self):
@@ -188,13 +496,144 @@ class Nav:
         
         try:
             db = get_db()
-            with db.engine.connect() as conn:
+            with get_connection() as conn:
                 conn.execute(
                     db.text('DELETE FROM navs WHERE id = :id'),
                     {'id': self.id}
                 )
-                conn.commit() 
+                commit(conn, catalog_changed=True)
                 return True
         except Exception as e:
             print(f"删除导航项 {self.id} 失败: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+    @staticmethod
+    def bulk_insert(navs):
+        """
+        批量新增导航项：同一事务内按片段执行多行 VALUES 插入，最后只提交一次
+        某片段执行失败时（如必填字段为空）逐行重试该片段，定位失败行；
+        SQLite 单条语句失败只撤销该语句本身，不影响事务内其他行
+        :param navs: list[Nav]（id 为空），成功的实例会回填 id
+        :return: (ids, errors)，ids 与 navs 一一对应（失败行为 None），errors 为 [{'index', 'error'}]
+        """
+        db = get_db()
+        ids = [None] * len(navs)
+        errors = []
+        with get_connection() as conn:
+            for start, chunk in _chunks(navs):
+                params = {}
+                values = []
+                for offset, nav in enumerate(chunk):
+                    row_params = nav._write_params()
+                    for column in _INSERT_COLUMNS:
+                        params[f'{column}_{offset}'] = row_params[column]
+                    values.append(_insert_values(f'_{offset}'))
+                try:
+                    rows = conn.execute(
+                        db.text(_INSERT_SQL + ', '.join(values) + ' RETURNING id'), params
+                    ).fetchall()
+                except Exception:
+                    rows = None
+                if rows is not None:
+                    # 单条语句内自增 id 按 VALUES 顺序连续分配，RETURNING 不保证顺序，排序后与输入对应
+                    for offset, nav_id in enumerate(sorted(row[0] for row in rows)):
+                        ids[start + offset] = nav_id
+                    continue
+                for offset, nav in enumerate(chunk):
+                    try:
+                        result = conn.execute(db.text(_INSERT_SQL + _insert_values()), nav._write_params())
+                        ids[start + offset] = result.lastrowid
+                    except Exception as e:
+                        errors.append({'index': start + offset, 'error': _error_message(e)})
+            for nav, nav_id in zip(navs, ids):
+                if nav_id is not None:
+                    nav.id = nav_id
+            if len(errors) < len(navs):
+                commit(conn, catalog_changed=True)
+        return ids, errors
+
+    @staticmethod
+    def bulk_update(navs):
+        """
+        批量更新导航项：同一事务内 executemany，最后只提交一次
+        不存在的 id 记为失败；executemany 出错时逐行重试，定位失败行
+        :param navs: list[Nav]（须带 id）
+        :return: (updated_ids, errors)，errors 为 [{'index', 'id', 'error'}]
+        """
+        db = get_db()
+        updated_ids = []
+        errors = []
+        with get_connection() as conn:
+            existing = set()
+            for _, chunk in _chunks([nav.id for nav in navs if nav.id]):
+                params = {f'id_{i}': nav_id for i, nav_id in enumerate(chunk)}
+                placeholders = ', '.join(f':{key}' for key in params)
+                rows = conn.execute(db.text(f'SELECT id FROM navs WHERE id IN ({placeholders})'), params)
+                existing.update(row[0] for row in rows)
+
+            pending = []
+            for index, nav in enumerate(navs):
+                if nav.id in existing:
+                    pending.append((index, nav, nav._write_params()))
+                else:
+                    errors.append({'index': index, 'id': nav.id, 'error': '导航项不存在'})
+
+            for _, chunk in _chunks(pending):
+                try:
+                    conn.execute(db.text(_UPDATE_SQL), [params for _, _, params in chunk])
+                    updated_ids.extend(nav.id for _, nav, _ in chunk)
+                    continue
+                except Exception:
+                    pass
+                # executemany 在出错行之前的更新已生效，逐行重试时重复执行结果相同
+                for index, nav, params in chunk:
+                    try:
+                        conn.execute(db.text(_UPDATE_SQL), params)
+                        updated_ids.append(nav.id)
+                    except Exception as e:
+                        errors.append({'index': index, 'id': nav.id, 'error': _error_message(e)})
+            if updated_ids:
+                commit(conn, catalog_changed=True)
+        errors.sort(key=lambda error: error['index'])
+        return updated_ids, errors
+
+    @staticmethod
+    def bulk_delete(ids):
+        """
+        批量删除导航项：同一事务内按片段执行 DELETE ... WHERE id IN (...) RETURNING id，最后只提交一次
+        片段执行失败时逐个重试，定位失败的 id
+        :param ids: 导航项ID列表
+        :return: (deleted, not_found, failed)，均为ID列表
+        """
+        db = get_db()
+        deleted = []
+        failed = []
+        with get_connection() as conn:
+            for _, chunk in _chunks(list(dict.fromkeys(ids))):
+                params = {f'id_{i}': nav_id for i, nav_id in enumerate(chunk)}
+                placeholders = ', '.join(f':{key}' for key in params)
+                try:
+                    rows = conn.execute(
+                        db.text(f'DELETE FROM navs WHERE id IN ({placeholders}) RETURNING id'), params
+                    ).fetchall()
+                    deleted.extend(row[0] for row in rows)
+                    continue
+                except Exception:
+                    pass
+                for nav_id in chunk:
+                    try:
+                        rows = conn.execute(
+                            db.text('DELETE FROM navs WHERE id = :id RETURNING id'), {'id': nav_id}
+                        ).fetchall()
+                        deleted.extend(row[0] for row in rows)
+                    except Exception as e:
+                        print(f"删除导航项 {nav_id} 失败: {_error_message(e)}")
+                        failed.append(nav_id)
+            if deleted:
+                commit(conn, catalog_changed=True)
+        deleted_set = set(deleted)
+        failed_set = set(failed)
+        not_found = [nav_id for nav_id in dict.fromkeys(ids) if nav_id not in deleted_set and nav_id not in failed_set]
+        # 保持输入顺序
+        deleted = [nav_id for nav_id in dict.fromkeys(ids) if nav_id in deleted_set]
+        return deleted, not_found, failed
@@ -1,25 +1,51 @@
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
+from utils.db import get_connection, commit
+from utils.rows import row_getter
+from utils.timestamps import LazyTimestamp
+
 # 延迟导入避免循环导入
 def get_db():
     from flask import current_app
     return current_app.extensions['sqlalchemy']
 
 class User:
-    """用户模型"""
+    """用户模型
+    实例使用 __slots__，查询结果按列名映射；created_at 保留数据库原始字符串，访问时才解析
+    """
+
+    __slots__ = ('id', 'username', 'password', '_created_at', '_created_at_raw')
+
+    # 构建实例所需的列（按列名取值，与查询列顺序无关）
+    COLUMNS = ('id', 'username', 'password', 'created_at')
+
+    created_at = LazyTimestamp()
     
     def __init__(self, **kwargs):
         self.id = kwargs.get('id')
         self.username = kwargs.get('username')
         self.password = kwargs.get('password')
         self.created_at = kwargs.get('created_at', datetime.utcnow())
+
+    @staticmethod
+    def _from_row(row):
+        """将查询结果行转换为 User（绕过 __init__，不解析时间字段）"""
+        user = User.__new__(User)
+        user.id, user.username, user.password, user._created_at_raw = row_getter(row._fields, User.COLUMNS)(row)
+        user._created_at = None
+        return user
+
+    @property
+    def created_at_text(self):
+        """created_at 的 'YYYY-MM-DD HH:MM:SS' 格式字符串（无需解析为 datetime）"""
+        return User.created_at.text(self)
     
     @staticmethod
     def create_table():
         """创建用户表"""
         db = get_db()
-        with db.engine.connect() as conn:
+        with get_connection() as conn:
             conn.execute(db.text('''
                 CREATE TABLE IF NOT EXISTS users (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -28,7 +54,7 @@ class User:
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             '''))
-            conn.commit()
+            commit(conn)
     
     @staticmethod
     def query():
@@ -39,24 +65,11 @@ class User:
     def get(user_id):
         """根据ID获取用户"""
         db = get_db()
-        with db.engine.connect() as conn:
+        with get_connection() as conn:
             result = conn.execute(db.text('SELECT * FROM users WHERE id = :id'), {'id': user_id})
             row = result.fetchone()
             if row:
-                # 安全地解析时间字符串
-                created_at = None
-                if row[3]:
-                    try:
-                        created_at = datetime.fromisoformat(row[3])
-                    except (ValueError, TypeError):
-                        # 如果解析失败，使用当前时间
-                        created_at = datetime.utcnow()
-                return User(
-                    id=row[0],
-                    username=row[1],
-                    password=row[2],
-                    created_at=created_at
-                )
+                return User._from_row(row)
         return None
     
     def set_password(self, password):
@@ -72,13 +85,13 @@ class User:
         return {
             'id': self.id,
             'username': self.username,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None
+            'created_at': self.created_at_text
         }
     
     def save(self):
         """保存用户到数据库"""
         db = get_db()
-        with db.engine.connect() as conn:
+        with get_connection() as conn:
             if self.id:
                 # 更新
                 conn.execute(db.text('''
@@ -100,7 +113,7 @@ class User:
                     'created_at': self.created_at
                 })
                 self.id = result.lastrowid
-            conn.commit()
+            commit(conn)
 
 class UserQuery:
     """用户查询类"""
@@ -113,7 +126,7 @@ class UserQuery:
     def first(self):
         """获取第一个结果"""
         db = get_db()
-        with db.engine.connect() as conn:
+        with get_connection() as conn:
             if 'username' in self.filters:
                 result = conn.execute(
                     db.text('SELECT * FROM users WHERE username = :username'), 
@@ -121,20 +134,7 @@ class UserQuery:
                 )
                 row = result.fetchone()
                 if row:
-                    # 安全地解析时间字符串
-                    created_at = None
-                    if row[3]:
-                        try:
-                            created_at = datetime.fromisoformat(row[3])
-                        except (ValueError, TypeError):
-                            # 如果解析失败，使用当前时间
-                            created_at = datetime.utcnow()
-                    return User(
-                        id=row[0],
-                        username=row[1],
-                        password=row[2],
-                        created_at=created_at
-                    )
+                    return User._from_row(row)
         return None
     
     def __repr__(self):
@@ -2,6 +2,12 @@ from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from models.category import Category
 from models.navs import Nav
+from utils.home import home_cache, build_home_changes
+from utils.category_tree import get_category_tree
+from utils.suggest import suggest_index, MAX_SUGGESTIONS
+from utils.cached_response import cached_json_response
+from utils.responses import success_response, error_response
+from utils.auth import validate_token
 import math
 
 api_bp = Blueprint('api', __name__)
@@ -21,10 +27,20 @@ def api_root():
             'auth': '/api/auth',
             'navigation': '/api/navs',
             'health': '/api/health',
-            'home': '/api/web/home'
+            'home': '/api/web/home',
+            'search': '/api/web/search',
+            'suggest': '/api/web/suggest'
         }
     })
 
+def _has_token():
+    """检查当前请求是否携带有效的JWT Token（可选认证）"""
+    try:
+        verify_jwt_in_request(optional=True)
+        return bool(get_jwt_identity())
+    except:
+        return False
+
 @api_bp.route('/web/home', methods=['GET'])
 def get_home_data():
     """
@@ -32,90 +48,20 @@ def get_home_data():
     判断是否有JWT Token：
     1. 没有JWT Token：获取所有分类及所有公开的导航项，按层级结构返回
     2. 有JWT Token：获取所有分类及其导航项，按层级结构返回
+    查询参数：
+    - mode: skeleton 时只返回分类树及各二级分类的 nav_count，
+      导航项通过 /api/web/home/navs 按分类分页加载
     """
     # 检查是否有有效的JWT Token
-    has_token = False
-    try:
-        verify_jwt_in_request(optional=True)
-        user_id = get_jwt_identity()
-        if user_id:
-            has_token = True
-    except:
-        has_token = False
+    has_token = _has_token()
+    skeleton = request.args.get('mode', '').lower() == 'skeleton'
     
     try:
-        # 获取所有顶级分类（parent_id为NULL的分类）
-        top_categories, _ = Category.get_all({'parent_id': None}, sort='sort_order')
+        # 目录版本未变化时直接使用缓存（含预序列化/预压缩响应体与ETag），写入后自动重建
+        payload = home_cache.get(has_token, skeleton)
         
-        # 按 sort_order 升序排序，相同 sort_order 按 created_at 降序
-        top_categories.sort(key=lambda x: (x.sort_order, -int(x.created_at.timestamp()) if x.created_at else 0))
-        
-        result = []
-        
-        # 构建层级结构
-        for top_category in top_categories:
-            category_data = {
-                'id': top_category.id,
-                'parent_id': top_category.parent_id,
-                'name': top_category.name,
-                'description': top_category.description,
-                'sort_order': top_category.sort_order,
-                'level': top_category.level,
-                'is_public': int(top_category.is_public) if top_category.is_public is not None else 1,
-                'created_at': top_category.created_at.strftime('%Y-%m-%d %H:%M:%S') if top_category.created_at else None,
-                'children': []
-            }
-            
-            # 获取子分类（parent_id等于当前分类id的分类）
-            sub_categories, _ = Category.get_all({'parent_id': top_category.id}, sort='sort_order')
-            
-            # 按 sort_order 升序排序，相同 sort_order 按 created_at 降序
-            sub_categories.sort(key=lambda x: (x.sort_order, -int(x.created_at.timestamp()) if x.created_at else 0))
-            
-            for sub_category in sub_categories:
-                sub_category_data = {
-                    'id': sub_category.id,
-                    'parent_id': sub_category.parent_id,
-                    'name': sub_category.name,
-                    'description': sub_category.description,
-                    'sort_order': sub_category.sort_order,
-                    'level': sub_category.level,
-                    'is_public': int(sub_category.is_public) if sub_category.is_public is not None else 1,
-                    'created_at': sub_category.created_at.strftime('%Y-%m-%d %H:%M:%S') if sub_category.created_at else None,
-                    'navs': []
-                }
-                
-                # 如果没有Token且分类不公开，navs设为空数组
-                if not has_token and not sub_category.is_public:
-                    sub_category_data['navs'] = []
-                else:
-                    # 获取导航项
-                    nav_filters = {'category_id': sub_category.id}
-                    
-                    # 如果没有Token，只获取公开的导航项
-                    if not has_token:
-                        nav_filters['is_public'] = True
-                    
-                    # 获取所有导航项（不分页）
-                    navs, _ = Nav.search(nav_filters, page=1, size=1000, sort='sort_order')
-                    
-                    # 按 sort_order 升序排序，相同 sort_order 按 created_at 降序
-                    navs.sort(key=lambda x: (x.sort_order, -int(x.created_at.timestamp()) if x.created_at else 0))
-                    
-                    # 添加导航项数据
-                    for nav in navs:
-                        nav_data = nav.to_dict()
-                        sub_category_data['navs'].append(nav_data)
-                
-                category_data['children'].append(sub_category_data)
-            
-            result.append(category_data)
-        
-        return jsonify({
-            'code': 1,
-            'msg': 'success',
-            'data': result
-        })
+        # ETag 匹配返回304；按 Accept-Encoding 返回压缩版本；不同Token状态返回内容不同
+        return cached_json_response(payload, vary='Authorization')
         
     except Exception as e:
         return jsonify({
@@ -123,3 +69,145 @@ def get_home_data():
             'msg': f'获取主页数据失败: {str(e)}',
             'data': []
         })
+
+
+@api_bp.route('/web/home/navs', methods=['GET'])
+def get_home_category_navs():
+    """
+    获取单个分类的导航项（分页）- 用户端，配合 mode=skeleton 按需加载
+    查询参数：
+    - category_id: 分类ID（必填）
+    - page: 页码，默认1
+    - size: 每页数量，默认50，最大200
+    无Token时可见范围与主页数据一致：仅二级及以下、自身及非顶级祖先均公开的分类下的公开导航项
+    """
+    has_token = _has_token()
+    category_id = request.args.get('category_id', type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
+    size = min(max(request.args.get('size', 50, type=int), 1), 200)
+    
+    if category_id is None:
+        return error_response("缺少参数: category_id", -2), 400
+    
+    try:
+        node = get_category_tree().get(category_id)
+        if not node:
+            return error_response("分类不存在"), 404
+        
+        items, total = [], 0
+        # 没有Token且分类匿名不可见时返回空列表（与主页数据、主页检索规则一致）
+        if has_token or (node.depth is not None and node.depth > 1 and node.visible):
+            filters = {'category_id': category_id}
+            if not has_token:
+                filters['is_public'] = True
+            items, total = Nav.search(filters, page, size, sort='home')
+        
+        pages = (total + size - 1) // size if total > 0 else 0
+        return success_response({
+            'list': [nav.to_dict() for nav in items],
+            'pagination': {
+                'page': page,
+                'size': size,
+                'total': total,
+                'pages': pages
+            }
+        }, "success")
+        
+    except Exception as e:
+        return error_response(f"获取导航项失败: {str(e)}"), 500
+
+@api_bp.route('/web/search', methods=['GET'])
+def search_home():
+    """
+    主页检索 - 用户端
+    查询参数：
+    - keyword: 关键词（必填），匹配导航项标题/描述、分类名称/描述，
+      支持拼音全拼与首字母前缀（如 kfzss、kaifa 可匹配“开发者搜索”）
+    - page: 页码，默认1
+    - size: 每页数量，默认20，最大100
+    返回命中的分类及分页的导航项；无Token时可见范围与主页数据一致
+    """
+    has_token = _has_token()
+    keyword = (request.args.get('keyword', type=str) or '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    size = min(max(request.args.get('size', 20, type=int), 1), 100)
+    
+    if not keyword:
+        return error_response("缺少参数: keyword", -2), 400
+    
+    try:
+        nodes = {category.id: category for category in Category.get_tree_nodes()}
+        filters = {'keyword': keyword}
+        if not has_token:
+            # 与主页数据规则一致：仅公开且所在分类（及非顶级祖先）公开的导航项
+            filters['is_public'] = True
+            filters['category_ids'] = [cid for cid, node in nodes.items() if node.depth > 1 and node.visible]
+        items, total = Nav.search(filters, page, size, sort='relevance')
+        
+        matched_ids = Category.search_ids(keyword)
+        categories = [node for cid, node in nodes.items()
+                      if cid in matched_ids and (has_token or node.visible)]
+        
+        data_list = []
+        for nav in items:
+            data = nav.to_dict()
+            category = nodes.get(nav.category_id)
+            data['category_name'] = category.name if category else None
+            data_list.append(data)
+        
+        pages = (total + size - 1) // size if total > 0 else 0
+        return success_response({
+            'categories': [category.to_dict() for category in categories],
+            'list': data_list,
+            'pagination': {
+                'page': page,
+                'size': size,
+                'total': total,
+                'pages': pages
+            }
+        }, "success")
+        
+    except Exception as e:
+        return error_response(f"检索失败: {str(e)}"), 500
+
+@api_bp.route('/web/suggest', methods=['GET'])
+def suggest():
+    """
+    输入联想 - 用户端（搜索框逐字输入时调用）
+    查询参数：
+    - q: 输入前缀（支持标题、主机名、分类名称及其拼音全拼/首字母）
+    - limit: 返回条数，默认10，最大20
+    仅包含匿名可见的分类与公开导航项，由进程内前缀索引提供，不查询数据库
+    """
+    q = request.args.get('q', '', type=str)
+    limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_SUGGESTIONS)
+    
+    try:
+        return success_response(suggest_index.suggest(q, limit), "success")
+    except Exception as e:
+        return error_response(f"获取联想结果失败: {str(e)}"), 500
+
+@api_bp.route('/web/home/changes', methods=['GET'])
+def get_home_changes():
+    """
+    主页数据增量同步 - 用户端
+    查询参数：
+    - since: 客户端已有数据的版本号（取自 /api/web/home 响应头 X-Catalog-Version 或上次同步返回的 version）
+    返回 since 之后变更的分类/导航项；日志已压缩或 since 不合法时返回 full_resync=true
+    """
+    has_token = _has_token()
+    since = request.args.get('since', type=int)
+    
+    try:
+        return success_response(build_home_changes(since, has_token), "success")
+    except Exception as e:
+        return error_response(f"获取增量数据失败: {str(e)}"), 500
+
+@api_bp.route('/web/home/cache-stats', methods=['GET'])
+@jwt_required()
+def get_home_cache_stats():
+    """主页缓存命中/未命中/重建耗时统计"""
+    is_valid, result = validate_token()
+    if not is_valid:
+        return error_response(result), 401
+    return success_response(home_cache.stats(), "success")
@@ -6,6 +6,8 @@ import json
 
 from utils.responses import success_response, error_response
 from utils.auth import validate_token
+from utils.cached_response import VersionedPayloadCache, cached_json_response
+from utils.category_tree import forest_dicts, get_category_tree
 
 categories_bp = Blueprint('categories', __name__)
 
@@ -23,6 +25,7 @@ def get_categories():
     - is_public: 公开状态筛选（1=公开，0=私有）
     - parent_id: 父分类ID筛选
     - keyword/q: 名称或描述模糊查询
+    每个分类附带直属导航项计数 nav_count（总数）/ public_nav_count（公开数）
     """
     try:
         # 验证token
@@ -37,7 +40,6 @@ def get_categories():
         level = request.args.get('level', type=int)
         is_public = request.args.get('is_public', type=int)
         kw = request.args.get('keyword', type=str) or request.args.get('q', type=str)
-        sort_field = 'sort_order'  # 固定排序字段，前端已移除排序选项
         
         # 构建过滤条件
         filters = {}
@@ -51,51 +53,24 @@ def get_categories():
         if is_public is not None:
             filters['is_public'] = is_public
         
-        # 获取所有符合条件的分类（用于构建树结构）
-        all_categories, total = Category.get_all(filters, None, None, sort_field)
-        
-        # 关键词过滤（名称/描述模糊匹配）
-        if kw:
-            kw_lc = kw.strip().lower()
-            def _text(v): return (v or '').lower()
-            all_categories = [c for c in all_categories if (kw_lc in _text(getattr(c, 'name', ''))) or (kw_lc in _text(getattr(c, 'description', '')))]
-            total = len(all_categories)
-        
-        # 构建树结构
-        category_dict = {cat.id: cat for cat in all_categories}
-        tree_data = []
-        
-        # 找出根分类并构建树
-        for category in all_categories:
-            if category.parent_id is None or category.parent_id not in category_dict:
-                # 为根分类添加子分类
-                category.children = []
-                tree_data.append(category)
-        
-        # 为每个分类添加其子分类
-        for category in all_categories:
-            if category.parent_id is not None and category.parent_id in category_dict:
-                parent = category_dict[category.parent_id]
-                if not hasattr(parent, 'children'):
-                    parent.children = []
-                parent.children.append(category)
-        
-        # 递归设置所有分类的children属性
-        def set_children(cat):
-            if not hasattr(cat, 'children'):
-                cat.children = []
-            for child in cat.children:
-                set_children(child)
-        
-        for cat in tree_data:
-            set_children(cat)
+        # 符合条件的分类（读取进程内分类树缓存，用于构建树结构）
+        all_categories = get_category_tree().filter(filters)
+        
+        # 关键词过滤（名称/描述模糊匹配，走 trigram 索引）
+        if kw and kw.strip():
+            matched_ids = Category.search_ids(kw)
+            all_categories = [c for c in all_categories if c.id in matched_ids]
+        total = len(all_categories)
+        
+        # 构建树结构：父分类不在结果中的分类作为根节点，附带分类树缓存中的导航项计数
+        tree_data = forest_dicts(all_categories, include_counts=True)
         
         # 构建分页信息
         pages = (total + size - 1) // size if total > 0 else 0
         
         # 构建响应数据（按照新的接口规范）
         data = [{
-            'list': [cat.to_dict(include_children=True) for cat in tree_data],
+            'list': tree_data,
             'pagination': {
                 'page': page,
                 'size': size,
@@ -139,13 +114,13 @@ def get_category_children(category_id):
         if not is_valid:
             return error_response(result), 401
         
-        # 检查父分类是否存在
-        parent = Category.get(category_id)
-        if not parent:
+        # 检查父分类是否存在（读取进程内分类树缓存）
+        tree = get_category_tree()
+        if not tree.get(category_id):
             return error_response("父分类不存在"), 404
         
         # 获取子分类
-        children = Category.get_children(category_id)
+        children = tree.children(category_id)
         data = [child.to_dict() for child in children]
         
         return success_response(data, "success")
@@ -223,8 +198,8 @@ def create_category():
                 level = parent.level + 1
                 
                 # 限制层级深度
-                if level > 5:
-                    return error_response("分类层级不能超过5级"), 400
+                if level > Category.MAX_LEVEL:
+                    return error_response(f"分类层级不能超过{Category.MAX_LEVEL}级"), 400
             except (ValueError, TypeError):
                 return error_response("父分类ID格式错误"), 400
         else:
@@ -309,39 +284,13 @@ def update_category(category_id):
         
         # 处理父分类变更
         if 'parent_id' in data:
-            new_parent_id = data['parent_id']
+            new_parent_id = data['parent_id'] or None
             if new_parent_id != category.parent_id:
-                # 验证新父分类
-                if new_parent_id:
-                    new_parent = Category.get(new_parent_id)
-                    if not new_parent:
-                        return error_response("新父分类不存在"), 400
-                    
-                    # 检查是否会形成循环引用
-                    if new_parent_id == category.id:
-                        return error_response("不能将分类设置为自己的父分类"), 400
-                    
-                    # 检查新父分类是否是当前分类的子分类
-                    def is_descendant(parent, child_id):
-                        children = Category.get_children(parent.id)
-                        for child in children:
-                            if child.id == child_id:
-                                return True
-                            if is_descendant(child, child_id):
-                                return True
-                        return False
-                    
-                    if is_descendant(category, new_parent_id):
-                        return error_response("不能将分类移动到其子分类下"), 400
-                    
-                    # 更新层级
-                    category.level = new_parent.level + 1
-                    if category.level > 5:
-                        return error_response("分类层级不能超过5级"), 400
-                else:
-                    # 移动到根级
-                    category.level = 1
-                
+                # 移动整棵子树：校验新父分类、循环引用及最深后代的层级，并重算全部后代的 level
+                try:
+                    category.level = Category.move(category.id, new_parent_id)
+                except ValueError as e:
+                    return error_response(str(e)), 400
                 category.parent_id = new_parent_id
         
         # 按需放开同级同名：不进行同级重名校验（包括编辑场景）
@@ -357,7 +306,17 @@ def update_category(category_id):
 @categories_bp.route('/<int:category_id>', methods=['DELETE'])
 @jwt_required()
 def delete_category(category_id):
-    """删除分类"""
+    """
+    删除分类
+    分类连同其下导航项一起删除；存在子分类时需 cascade=true，删除整棵子树（全部后代分类及其导航项）
+    
+    查询参数:
+        cascade: 是否级联删除子分类，默认false
+        dry_run: 是否为预检模式，默认false（只统计将删除的分类数与导航项数，不实际删除）
+    
+    Returns:
+        JSON: {categories: 删除的分类数, navs: 删除的导航项数}
+    """
     try:
         # 验证token
         is_valid, result = validate_token()
@@ -366,38 +325,50 @@ def delete_category(category_id):
         
         # 获取查询参数
         cascade = request.args.get('cascade', 'false').lower() == 'true'
+        dry_run = request.args.get('dry_run', 'false').lower() in ('true', '1')
         
         # 获取分类
         category = Category.get(category_id)
         if not category:
             return error_response("分类不存在"), 404
         
-        # 检查子分类
-        children = Category.get_children(category_id)
-        if children and not cascade:
-            return error_response("分类下存在子分类，无法删除", 0), 400
-        
-        # 删除分类
+        # 同一事务内删除整棵子树及其导航项（存在子分类且未指定 cascade 时拒绝删除）
         try:
-            if cascade and children:
-                # 级联删除子分类
-                for child in children:
-                    child.delete()
-            
-            category.delete()
-            return success_response(None, "success")
+            counts = Category.delete_subtree(category_id, cascade=cascade, dry_run=dry_run)
         except ValueError as e:
             return error_response(str(e)), 400
+        return success_response(counts, "dry_run" if dry_run else "success")
         
     except Exception as e:
         return error_response(f"删除分类失败: {str(e)}"), 500
 
+@categories_bp.route('/nav-counts/rebuild', methods=['POST'])
+@jwt_required()
+def rebuild_nav_counts():
+    """
+    按导航项全量重建分类导航项计数（计数由触发器增量维护，仅在数据被绕过触发器修改后修复用）
+    
+    Returns:
+        JSON: {categories: 有导航项的分类数}
+    """
+    try:
+        # 验证token
+        is_valid, result = validate_token()
+        if not is_valid:
+            return error_response(result), 401
+        
+        count = Category.rebuild_nav_counts()
+        return success_response({'categories': count}, "success")
+        
+    except Exception as e:
+        return error_response(f"重建分类导航项计数失败: {str(e)}"), 500
+
 @categories_bp.route('/categoriesRoot', methods=['GET'])
 @jwt_required()
 def get_root_categories():
     """
     获取所有顶级分类列表
-    返回所有parent_id为null的分类
+    返回所有parent_id为null的分类，附带直属导航项计数 nav_count / public_nav_count
     """
     try:
         # 验证token
@@ -405,11 +376,11 @@ def get_root_categories():
         if not is_valid:
             return error_response(result), 401
         
-        # 获取所有顶级分类（parent_id为null）
-        root_categories, _ = Category.get_all({'parent_id': None}, None, None, 'sort_order')
+        # 获取所有顶级分类（parent_id为null，读取进程内分类树缓存）
+        root_categories = get_category_tree().children(None)
         
-        # 转换为字典格式
-        data = [cat.to_dict() for cat in root_categories]
+        # 转换为字典格式（附带导航项计数）
+        data = [cat.to_dict(include_counts=True) for cat in root_categories]
         
         return success_response(data, "success")
         
@@ -421,7 +392,7 @@ def get_root_categories():
 @jwt_required()
 def get_all_children_categories():
     """
-    返回系统内所有子分类（parent_id 非空）的平铺列表
+    返回系统内所有子分类（parent_id 非空）的平铺列表，附带直属导航项计数 nav_count / public_nav_count
     可选 is_public 过滤（0/1）
     """
     try:
@@ -432,18 +403,29 @@ def get_all_children_categories():
 
         is_public = request.args.get('is_public', type=int)
 
-        # 复用现有模型查询，先取全部后在内存中过滤，避免修改模型方法
-        all_categories, _ = Category.get_all({}, None, None, 'sort_order')
-
-        children = [c for c in all_categories if c.parent_id is not None]
+        # 读取进程内分类树缓存，在内存中过滤
+        children = [c for c in get_category_tree().categories if c.parent_id is not None]
         if is_public is not None:
             children = [c for c in children if int(getattr(c, 'is_public', 0)) == int(is_public)]
 
-        data = [c.to_dict() for c in children]
+        data = [c.to_dict(include_counts=True) for c in children]
         return success_response(data, "success")
     except Exception as e:
         return error_response(f"获取子分类失败: {str(e)}"), 500
 
+# 公开分类响应缓存：按 tree 参数分别缓存，目录版本变化时重建
+public_categories_cache = VersionedPayloadCache()
+
+def _build_public_categories(tree):
+    """构建公开分类数据（列表或树结构）"""
+    categories = get_category_tree().filter({'is_public': True})
+    if tree:
+        # 返回公开分类的树结构：仅从顶级分类开始组装，父分类不公开的分类不返回
+        return forest_dicts(categories, orphans_as_roots=False)
+    
+    # 返回公开分类列表
+    return [cat.to_dict() for cat in categories]
+
 # 公共接口（不需要认证）
 @categories_bp.route('/public', methods=['GET'])
 def get_public_categories():
@@ -452,29 +434,12 @@ def get_public_categories():
         # 获取查询参数
         tree = request.args.get('tree', 'false').lower() == 'true'
         
-        if tree:
-            # 返回公开分类的树结构
-            all_categories, _ = Category.get_all({'is_public': True})
-            category_dict = {cat.id: cat for cat in all_categories}
-            
-            tree_data = []
-            for category in all_categories:
-                if category.parent_id is None:
-                    tree_data.append(category)
-                else:
-                    parent = category_dict.get(category.parent_id)
-                    if parent:
-                        if not hasattr(parent, 'children'):
-                            parent.children = []
-                        parent.children.append(category)
-            
-            data = [cat.to_dict(include_children=True) for cat in tree_data]
-        else:
-            # 返回公开分类列表
-            categories, _ = Category.get_all({'is_public': True})
-            data = [cat.to_dict() for cat in categories]
-        
-        return success_response(data, "success")
+        # 每个目录版本只构建、序列化、压缩一次
+        payload = public_categories_cache.get_payload(
+            'tree' if tree else 'list',
+            lambda: _build_public_categories(tree)
+        )
+        return cached_json_response(payload)
         
     except Exception as e:
         return error_response(f"获取公开分类失败: {str(e)}"), 500
@@ -9,6 +9,7 @@ nav_bp = Blueprint('navigation', __name__)
 # 与 categories 路由保持一致的响应与鉴权工具
 from utils.responses import success_response, error_response
 from utils.auth import validate_token
+from utils.counts import TOTAL_EXACT, TOTAL_MODES
 
 # 工具：将布尔/字符串/数字统一转换为 0/1（按文档规范返回/入库）
 def _to_int01(value, default=1):
@@ -91,7 +92,11 @@ def search_navs():
         is_public: 是否公开，0或1
         keyword: 搜索关键词
         category_id: 分类ID
-        sort: 排序字段，默认sort_order，可选created_at
+        sort: 排序字段，默认sort_order（有keyword时默认relevance），可选created_at
+        cursor: 游标分页（可选）。传入该参数（首页传空值）即启用游标模式，
+                忽略 page，返回 pagination.next_cursor，为 null 表示没有下一页
+        with_total: 总数模式，默认exact；estimated 使用缓存的同条件总数（可能略有滞后），
+                    none 不统计总数（total/pages 返回 null）
     
     Returns:
         JSON: 导航项列表和分页信息
@@ -106,7 +111,11 @@ def search_navs():
         is_public = request.args.get('is_public', type=int)
         keyword = request.args.get('keyword', type=str)
         category_id = request.args.get('category_id', type=int)
-        sort = request.args.get('sort', 'sort_order')
+        # 有关键词且未指定排序时按相关度排序
+        sort = request.args.get('sort', 'relevance' if keyword else 'sort_order')
+        with_total = request.args.get('with_total', TOTAL_EXACT)
+        if with_total not in TOTAL_MODES:
+            return error_response(f"with_total 仅支持: {', '.join(TOTAL_MODES)}"), 400
 
         filters = {}
         if is_public is not None:
@@ -116,7 +125,15 @@ def search_navs():
         if category_id is not None:
             filters['category_id'] = category_id
 
-        items, total = Nav.search(filters, page, size, sort)
+        cursor = request.args.get('cursor')
+        next_cursor = None
+        if cursor is not None:
+            try:
+                items, total, next_cursor = Nav.search_after(filters, cursor or None, size, sort, with_total)
+            except ValueError as e:
+                return error_response(str(e)), 400
+        else:
+            items, total = Nav.search(filters, page, size, sort, with_total)
 
         # 附带分类名称（按需）
         cat_names = {}
@@ -131,7 +148,20 @@ def search_navs():
             d['category_name'] = cat_names.get(it.category_id)
             data_list.append(d)
 
-        pages = (total + size - 1) // size if total > 0 else 0
+        if total is None:
+            pages = None
+        else:
+            pages = (total + size - 1) // size if total > 0 else 0
+        if cursor is not None:
+            return success_response({
+                'list': data_list,
+                'pagination': {
+                    'size': size,
+                    'total': total,
+                    'pages': pages,
+                    'next_cursor': next_cursor
+                }
+            }, "success")
         return success_response({
             'list': data_list,
             'pagination': {
@@ -381,6 +411,13 @@ def import_navs():
         errors = []
         preview = []
         processed_keys = set()  # 用于去重
+        pending = []  # 校验通过的行：(行号, 原始行, 分类名称, Nav)
+        
+        # 一次解析全部不同的分类名称（不区分大小写）
+        name_index = header_map['category_name']
+        category_ids = Category.names_to_ids(
+            row[name_index].strip() for row in rows[1:] if len(row) > name_index
+        )
         
         for i, row in enumerate(rows[1:], 1):  # 跳过表头
             try:
@@ -420,15 +457,13 @@ def import_navs():
                     continue
                 
                 # 根据分类名称查找分类ID
-                category = Category.find_by_name(category_name)
-                if not category:
+                category_id = category_ids.get(category_name)
+                if category_id is None:
                     error_msg = f"第{i}行: 分类名称'{category_name}'不存在"
                     errors.append({"row": i, "error": error_msg, "data": row})
                     failed_count += 1
                     continue
                 
-                category_id = category.id
-                
                 # 去重检查
                 if dedupe:
                     dedup_key = f"{category_id}:{normalized_url}"
@@ -443,7 +478,7 @@ def import_navs():
                 if not icon:
                     icon = _auto_icon_url(normalized_url)
                 
-                # 创建导航项
+                # 待写入的导航项，校验全部完成后一次批量插入
                 nav = Nav(
                     category_id=category_id,
                     title=title,
@@ -453,22 +488,33 @@ def import_navs():
                     sort_order=sort_order,
                     is_public=is_public
                 )
-                nav.save()
-                
-                # 添加到预览列表
-                preview_item = {
-                    "title": title,
-                    "url": normalized_url,
-                    "category_name": category_name
-                }
-                preview.append(preview_item)
-                success_count += 1
+                pending.append((i, row, category_name, nav))
                 
             except Exception as e:
                 error_msg = f"第{i}行: 处理失败 - {str(e)}"
                 errors.append({"row": i, "error": error_msg, "data": row})
                 failed_count += 1
         
+        # 同一事务批量写入，单行失败不影响其他行
+        ids, insert_errors = Nav.bulk_insert([nav for _, _, _, nav in pending])
+        for error in insert_errors:
+            i, row, _, _ = pending[error['index']]
+            errors.append({"row": i, "error": f"第{i}行: 处理失败 - {error['error']}", "data": row})
+            failed_count += 1
+        errors.sort(key=lambda e: e['row'])
+        
+        for (i, row, category_name, nav), nav_id in zip(pending, ids):
+            if nav_id is None:
+                continue
+            # 添加到预览列表
+            preview_item = {
+                "title": nav.title,
+                "url": nav.url,
+                "category_name": category_name
+            }
+            preview.append(preview_item)
+            success_count += 1
+        
         # 返回结果
         return success_response({
             "total": total,
@@ -542,43 +588,17 @@ def bulk_delete_navs():
         
         # 预检模式：只检查ID是否存在，不实际删除
         if dry_run:
-            not_found = []
-            will_delete = []
-            
-            for nav_id in valid_ids:
-                nav = Nav.get(nav_id)
-                if not nav:
-                    not_found.append(nav_id)
-                else:
-                    will_delete.append(nav_id)
+            existing = {nav.id for nav in Nav.get_all({'ids': valid_ids})}
+            not_found = [nav_id for nav_id in valid_ids if nav_id not in existing]
             
             return success_response({
                 "requested": len(valid_ids),
-                "will_delete": len(will_delete),
+                "will_delete": len(valid_ids) - len(not_found),
                 "not_found": not_found
             }, "dry_run")
         
-        # 实际删除模式
-        deleted = []
-        not_found = []
-        failed = []
-        
-        for nav_id in valid_ids:
-            try:
-                nav = Nav.get(nav_id)
-                if not nav:
-                    not_found.append(nav_id)
-                    continue
-                
-                ok = nav.delete()
-                if ok:
-                    deleted.append(nav_id)
-                else:
-                    failed.append(nav_id)
-            except Exception as e:
-                print(f"删除ID {nav_id} 时出错: {str(e)}")
-                # 单个删除失败不影响整体流程
-                failed.append(nav_id)
+        # 实际删除模式：同一事务批量删除，单个删除失败不影响整体流程
+        deleted, not_found, failed = Nav.bulk_delete(valid_ids)
         
         return success_response({
             "requested": len(valid_ids),
@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+
+from utils.search import prefix_query, substring_queries, word_query
+
+TITLES = ['CodePen', 'C++ 参考手册', 'Node.js 中文网', 'abc++', 'GitHub', 'c']
+
+
+@pytest.mark.parametrize('keyword', ['c++', 'c#', 'node.js', 'a/b', 'foo-bar', 'https://', 'git c++'])
+def test_word_query_rejects_punctuation(keyword):
+    """含标点的词会被 unicode61 拆开，不能作为词前缀检索来源"""
+    assert word_query(keyword) is None
+
+
+@pytest.mark.parametrize('keyword', ['开发', 'git开发'])
+def test_word_query_rejects_cjk(keyword):
+    assert word_query(keyword) is None
+
+
+def test_word_query_accepts_alnum_terms():
+    assert word_query(' Git  hub2 ') == prefix_query('Git hub2') == '"Git"* AND "hub2"*'
+
+
+def _like(titles, keyword):
+    return {title for title in titles if keyword.lower() in title.lower()}
+
+
+@pytest.mark.parametrize('keyword', ['c++', 'node.js', 'code', 'git', 'hub'])
+def test_search_sources_never_widen_like(keyword):
+    """词前缀与子串索引来源的命中均为 LIKE 命中的子集（c++ 不应命中 CodePen）"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE VIRTUAL TABLE words USING fts5(title, tokenize='unicode61')")
+    conn.execute("CREATE VIRTUAL TABLE trgm USING fts5(title, tokenize='trigram')")
+    conn.executemany('INSERT INTO words (title) VALUES (?)', [(t,) for t in TITLES])
+    conn.executemany('INSERT INTO trgm (title) VALUES (?)', [(t,) for t in TITLES])
+    expected = _like(TITLES, keyword)
+
+    got = set()
+    query = word_query(keyword)
+    if query:
+        got |= {row[0] for row in conn.execute('SELECT title FROM words WHERE words MATCH ?', (query,))}
+    trigram, _ = substring_queries(keyword)
+    got |= {row[0] for row in conn.execute('SELECT title FROM trgm WHERE trgm MATCH ?', (trigram,))}
+    assert got == expected
@@ -0,0 +1,181 @@
+import gzip
+import hashlib
+import threading
+import time
+
+from flask import Response, current_app, request
+
+from utils.catalog import get_catalog_version
+
+# brotli 为可选依赖：未安装时仅提供 gzip 压缩版本
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 小于该字节数的响应体不压缩（压缩收益小于额外开销）
+MIN_COMPRESS_SIZE = 512
+
+
+def _compress(body, encoding):
+    if encoding == 'gzip':
+        # mtime 固定为0，保证同一内容的压缩结果稳定
+        return gzip.compress(body, compresslevel=9, mtime=0)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(body, quality=11)
+    return None
+
+
+def supported_encodings():
+    """服务端可提供的压缩编码，按优先级排序"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def serialize_payload(data):
+    """按 jsonify 的输出格式序列化统一响应体（code/msg/data），返回 (bytes, etag)
+    ETag 取响应体摘要，同一内容在不同进程/重启后保持一致
+    """
+    body = current_app.json.response({
+        'code': 1,
+        'msg': 'success',
+        'data': data
+    }).get_data()
+    etag = hashlib.sha1(body).hexdigest()
+    return body, etag
+
+
+class CachedPayload:
+    """某一目录版本下的响应快照：原始数据 + 预序列化响应体 + 强ETag
+    压缩版本按需生成一次后复用，直到目录版本变化
+    """
+
+    __slots__ = ('version', 'data', 'body', 'etag', 'headers', '_variants', '_lock')
+
+    def __init__(self, version, data, body, etag, headers=None):
+        self.version = version
+        self.data = data
+        self.body = body
+        self.etag = etag
+        self.headers = headers or {}
+        self._variants = {}  # encoding -> (body, etag)
+        self._lock = threading.Lock()
+
+    def variant(self, encoding):
+        """获取指定编码的响应体，返回 (body, etag, encoding)
+        不支持该编码或响应体过小时返回未压缩版本（encoding 为 None）
+        """
+        if not encoding or len(self.body) < MIN_COMPRESS_SIZE:
+            return self.body, self.etag, None
+
+        cached = self._variants.get(encoding)
+        if cached is None:
+            with self._lock:
+                cached = self._variants.get(encoding)
+                if cached is None:
+                    compressed = _compress(self.body, encoding)
+                    # 强ETag需区分不同编码的表示
+                    cached = (compressed, f'{self.etag}-{encoding}') if compressed else (None, None)
+                    self._variants[encoding] = cached
+
+        if cached[0] is None:
+            return self.body, self.etag, None
+        return cached[0], cached[1], encoding
+
+    def encodings(self):
+        """已生成的压缩编码"""
+        return [encoding for encoding, cached in self._variants.items() if cached[0] is not None]
+
+
+class VersionedPayloadCache:
+    """按目录版本失效的进程内响应缓存
+    每个 key 缓存一个 CachedPayload，目录版本号变化时才重新构建并序列化
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> CachedPayload
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.rebuild_time_total = 0.0
+        self.rebuild_time_last = 0.0
+
+    def get_payload(self, key, build, headers=None):
+        """获取 key 对应的响应快照，版本未变化时直接返回缓存
+        :param key: 缓存键
+        :param build: 无参构建函数，返回响应 data
+        :param headers: 可选无参函数，在构建前调用，返回随快照一起下发的响应头
+        """
+        version = get_catalog_version()
+        entry = self._entries.get(key)
+        if entry and entry.version == version:
+            self.hits += 1
+            return entry
+
+        with self._lock:
+            # 双重检查：等待锁期间可能已被其他请求重建
+            version = get_catalog_version()
+            entry = self._entries.get(key)
+            if entry and entry.version == version:
+                self.hits += 1
+                return entry
+
+            self.misses += 1
+            started = time.perf_counter()
+            extra_headers = headers() if headers else None
+            data = build()
+            body, etag = serialize_payload(data)
+            elapsed = time.perf_counter() - started
+
+            # 以构建前读取的版本号入库：构建期间若有写入，下次请求会再次重建
+            entry = CachedPayload(version, data, body, etag, extra_headers)
+            self._entries[key] = entry
+            self.rebuilds += 1
+            self.rebuild_time_last = elapsed
+            self.rebuild_time_total += elapsed
+            return entry
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """缓存命中统计"""
+        return {
+            'version': get_catalog_version(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'rebuilds': self.rebuilds,
+            'rebuild_time_last_ms': round(self.rebuild_time_last * 1000, 3),
+            'rebuild_time_avg_ms': round(self.rebuild_time_total * 1000 / self.rebuilds, 3) if self.rebuilds else 0,
+            'cached_versions': {key: entry.version for key, entry in self._entries.items()},
+            'encodings': {key: entry.encodings() for key, entry in self._entries.items()},
+        }
+
+
+def cached_json_response(payload, vary=None):
+    """根据 Accept-Encoding / If-None-Match 返回缓存快照对应的响应
+    - 选择客户端可接受的压缩版本（br > gzip > 不压缩）
+    - ETag 匹配时返回 304，不传输响应体
+    :param payload: CachedPayload
+    :param vary: 额外的 Vary 请求头（如 Authorization）
+    """
+    encoding = request.accept_encodings.best_match(supported_encodings())
+    body, etag, encoding = payload.variant(encoding)
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    for name, value in payload.headers.items():
+        response.headers[name] = value
+    # 每次使用前向服务端校验
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    if vary:
+        response.vary.add(vary)
+    return response
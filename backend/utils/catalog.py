@@ -0,0 +1,53 @@
+from flask import g, has_request_context
+
+# 目录（分类 + 导航项）数据版本号：存于 catalog_meta，每次写入在同一事务内递增，供各级缓存判断是否失效
+# 多个工作进程共享同一数据库，任一进程的写入提交后，其他进程下一个请求即可读到新版本
+CATALOG_VERSION_KEY = 'catalog_version'
+
+# 本进程内提交的目录变更次数：供按时间间隔检查版本号的缓存判断本进程是否有写入，无需查询数据库
+_local_commits = 0
+
+
+def _read_catalog_version():
+    """从数据库读取版本号（行不存在时为0）"""
+    # 延迟导入避免循环导入（utils.db 依赖本模块）
+    from utils.db import get_connection, get_db
+    with get_connection() as conn:
+        row = conn.execute(get_db().text(
+            'SELECT value FROM catalog_meta WHERE key = :key'
+        ), {'key': CATALOG_VERSION_KEY}).fetchone()
+        return row[0] if row else 0
+
+
+def get_catalog_version():
+    """获取当前目录数据版本号
+    请求内只读取一次数据库（本请求的写入提交后重新读取）；非请求上下文中每次读取
+    """
+    if not has_request_context():
+        return _read_catalog_version()
+    version = g.get('_catalog_version')
+    if version is None:
+        version = g._catalog_version = _read_catalog_version()
+    return version
+
+
+def bump_catalog_version(conn, text):
+    """目录数据发生变更时在提交前调用：与数据写入同一事务递增版本号，
+    提交前其他连接读不到新版本，避免用未提交的数据重建缓存
+    """
+    conn.execute(text(
+        'UPDATE catalog_meta SET value = value + 1 WHERE key = :key'
+    ), {'key': CATALOG_VERSION_KEY})
+    if has_request_context():
+        g.pop('_catalog_version', None)
+
+
+def note_catalog_committed():
+    """目录变更提交后调用，递增本进程的提交计数"""
+    global _local_commits
+    _local_commits += 1
+
+
+def local_commit_count():
+    """本进程内提交的目录变更次数"""
+    return _local_commits
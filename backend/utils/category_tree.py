@@ -0,0 +1,131 @@
+import threading
+
+from models.category import Category
+from utils.catalog import get_catalog_version
+from utils.counts import TOTAL_NONE
+
+# 层级上限：防止脏数据中过深的链或环导致无限遍历
+MAX_DEPTH = 16
+
+
+class CategoryTree:
+    """某一目录版本下的分类树快照（只读，进程内所有请求共享，调用方不得修改其中的实例）
+    - nodes: id -> Category
+    - 子分类列表：parent_id -> 按 sort_order、created_at 排序的子分类（顶级分类的 parent_id 为 None）
+    - 每个分类附加 depth（顶级为1，从顶级不可达时为 None）、visible（匿名可见性：顶级恒为真，
+      其余需自身及所有非顶级祖先均公开）、children（子分类列表）
+    - 每个分类带直属导航项计数 nav_count / public_nav_count（与分类同一条查询读取）
+    """
+
+    def __init__(self, categories):
+        self.categories = categories
+        self.nodes = {category.id: category for category in categories}
+        self._children = {}
+        for category in categories:
+            category.depth = None
+            category.visible = False
+            self._children.setdefault(category.parent_id, []).append(category)
+        for category in categories:
+            category.children = self._children.get(category.id, [])
+
+        # 自顶级分类逐层向下计算深度与可见性
+        level = self._children.get(None, [])
+        depth = 1
+        while level and depth <= MAX_DEPTH:
+            next_level = []
+            for category in level:
+                category.depth = depth
+                category.visible = depth == 1 or (category.is_public and self.nodes[category.parent_id].visible)
+                next_level.extend(category.children)
+            level = next_level
+            depth += 1
+        self.reachable = [category for category in categories if category.depth is not None]
+
+    def get(self, category_id):
+        """按ID获取分类，不存在时返回 None"""
+        return self.nodes.get(category_id)
+
+    def children(self, parent_id):
+        """直接子分类（parent_id 为 None 时返回顶级分类）"""
+        return list(self._children.get(parent_id, []))
+
+    def filter(self, filters=None):
+        """按条件过滤全部分类（保持排序），支持 is_public、parent_id、level，与 Category.get_all 的过滤条件一致"""
+        categories = self.categories
+        if not filters:
+            return list(categories)
+        if 'parent_id' in filters:
+            categories = self._children.get(filters['parent_id'], [])
+        if 'is_public' in filters:
+            is_public = int(filters['is_public'])
+            categories = [category for category in categories if int(category.is_public) == is_public]
+        if 'level' in filters:
+            categories = [category for category in categories if category.level == filters['level']]
+        return list(categories)
+
+
+def forest_dicts(categories, orphans_as_roots=True, include_counts=False):
+    """将一组分类组装为嵌套结构（格式同 to_dict(include_children=True)），不修改分类实例
+    :param orphans_as_roots: 父分类不在该组中的分类是否作为根节点；为 False 时只有顶级分类作为根节点
+    :param include_counts: 是否附加导航项计数 nav_count / public_nav_count
+    """
+    ids = {category.id for category in categories}
+    children_map = {}
+    roots = []
+    for category in categories:
+        if category.parent_id is not None and category.parent_id in ids:
+            children_map.setdefault(category.parent_id, []).append(category)
+        elif category.parent_id is None or orphans_as_roots:
+            roots.append(category)
+
+    def build(category, depth=1):
+        data = category.to_dict(include_counts=include_counts)
+        children = children_map.get(category.id, []) if depth < MAX_DEPTH else []
+        data['children'] = [build(child, depth + 1) for child in children]
+        return data
+
+    return [build(category) for category in roots]
+
+
+class CategoryTreeCache:
+    """进程内分类树缓存：目录版本变化后首次访问时整体重建（一次查询），之后的层级查询均为字典读取"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (目录版本号, 分类树快照)，整体替换，读取无需加锁
+        self._state = (None, None)
+        self.rebuilds = 0
+
+    def get(self):
+        """当前目录版本的分类树快照，版本未变化时不访问数据库"""
+        cached_version, tree = self._state
+        if tree is not None and cached_version == get_catalog_version():
+            return tree
+        with self._lock:
+            # 双重检查：等待锁期间可能已被其他请求重建
+            version = get_catalog_version()
+            cached_version, tree = self._state
+            if tree is None or cached_version != version:
+                categories, _ = Category.get_all(with_total=TOTAL_NONE, with_counts=True)
+                tree = CategoryTree(categories)
+                # 以重建前读取的版本号记录：重建期间若有写入，下次访问会再次重建
+                self._state = (version, tree)
+                self.rebuilds += 1
+            return tree
+
+    def stats(self):
+        """缓存统计"""
+        version, tree = self._state
+        return {
+            'version': version,
+            'categories': len(tree.categories) if tree else 0,
+            'rebuilds': self.rebuilds
+        }
+
+
+category_tree = CategoryTreeCache()
+
+
+def get_category_tree():
+    """当前目录版本的分类树快照"""
+    return category_tree.get()
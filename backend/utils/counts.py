@@ -0,0 +1,70 @@
+import threading
+import time
+
+from utils.catalog import get_catalog_version
+
+# 分页总数模式
+TOTAL_EXACT = 'exact'          # 精确总数：与分页查询同一条语句（COUNT(*) OVER ()）
+TOTAL_ESTIMATED = 'estimated'  # 估算总数：优先使用缓存的同条件总数，未命中时按精确计算
+TOTAL_NONE = 'none'            # 不返回总数
+TOTAL_MODES = (TOTAL_EXACT, TOTAL_ESTIMATED, TOTAL_NONE)
+
+
+class FilterCountCache:
+    """按检索条件缓存的总数，供 estimated 模式使用
+    目录版本未变化时缓存值即精确值；版本变化后在 max_age 秒内仍作为估算值使用
+    """
+
+    def __init__(self, max_entries=512, max_age=60):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (version, count, stored_at)
+
+    def get(self, key):
+        """获取缓存的总数，无可用缓存时返回 None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        version, count, stored_at = entry
+        if version == get_catalog_version() or time.monotonic() - stored_at < self.max_age:
+            return count
+        return None
+
+    def set(self, key, count, version):
+        """记录某检索条件的精确总数
+        :param version: 查询前读取的目录版本号（查询期间若有写入，缓存值不会被当作最新版本的精确值）
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                # 淘汰最早写入的条目
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (version, count, time.monotonic())
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+
+filter_counts = FilterCountCache()
+
+
+def count_key(from_clause, where_clause, params):
+    """检索条件对应的缓存键"""
+    return from_clause, where_clause, tuple(sorted(params.items()))
+
+
+def paged_total(conn, text, from_clause, where_clause, params, rows, offset, key, version):
+    """从带 COUNT(*) OVER () 末列的分页结果中取精确总数并写入缓存
+    页码越界（结果为空且 offset > 0）时无法从结果取得总数，回退到单独的 COUNT 查询
+    """
+    if rows:
+        total = rows[0][-1]
+    elif offset:
+        total = conn.execute(text(f'SELECT COUNT(*) FROM {from_clause}{where_clause}'), params).fetchone()[0]
+    else:
+        total = 0
+    filter_counts.set(key, total, version)
+    return total
@@ -0,0 +1,164 @@
+from contextlib import contextmanager
+import re
+
+from flask import g, has_request_context, request
+
+from utils.catalog import bump_catalog_version, note_catalog_committed
+
+# 写请求使用工作单元：请求内所有模型调用共享同一连接，结束时统一提交一次
+UNIT_OF_WORK_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+
+def get_db():
+    from flask import current_app
+    return current_app.extensions['sqlalchemy']
+
+
+@contextmanager
+def get_connection():
+    """获取数据库连接
+    请求上下文内复用同一连接（请求结束时关闭），连接检出与 SQLite 文件打开每个请求只发生一次；
+    脚本等非请求上下文中每次新建连接，退出时关闭
+    """
+    if not has_request_context():
+        with get_db().engine.connect() as conn:
+            yield conn
+        return
+
+    conn = g.get('_db_conn')
+    if conn is None:
+        conn = get_db().engine.connect()
+        g._db_conn = conn
+    yield conn
+
+
+def commit(conn, catalog_changed=False):
+    """提交事务
+    处于工作单元中时延迟到请求结束统一提交；目录版本号与数据在同一事务内递增，
+    真正提交后其他请求（含其他工作进程）才会读到新版本
+    :param conn: 当前连接
+    :param catalog_changed: 本次写入是否修改了分类/导航项
+    """
+    if has_request_context() and g.get('_db_unit_of_work'):
+        if catalog_changed:
+            g._db_catalog_changed = True
+        return
+    if catalog_changed:
+        bump_catalog_version(conn, get_db().text)
+    conn.commit()
+    if catalog_changed:
+        note_catalog_committed()
+
+
+def init_request_connection(app):
+    """注册请求级连接与工作单元
+    注意：需在其他依赖已提交数据的 after_request 钩子（如静态快照发布）之后注册，
+    Flask 按注册的逆序执行 after_request，保证先提交再发布
+    """
+
+    @app.before_request
+    def begin_unit_of_work():
+        g._db_unit_of_work = request.method in UNIT_OF_WORK_METHODS
+
+    @app.after_request
+    def commit_unit_of_work(response):
+        conn = g.get('_db_conn')
+        if conn is None or not g.get('_db_unit_of_work'):
+            return response
+        g._db_unit_of_work = False
+        if response.status_code >= 500:
+            conn.rollback()
+            return response
+        try:
+            catalog_changed = g.pop('_db_catalog_changed', False)
+            if catalog_changed:
+                bump_catalog_version(conn, get_db().text)
+            conn.commit()
+            if catalog_changed:
+                note_catalog_committed()
+        except Exception as e:
+            conn.rollback()
+            app.logger.error(f'事务提交失败: {e}')
+            from utils.responses import error_response
+            response = error_response(f'事务提交失败: {str(e)}')
+            response.status_code = 500
+            return response
+        return response
+
+    @app.teardown_request
+    def close_connection(exc):
+        conn = g.pop('_db_conn', None)
+        if conn is not None:
+            # 未提交的事务（异常或只读请求）在关闭时回滚
+            conn.close()
+
+
+def ensure_column(conn, table, column, definition):
+    """为已存在的表补充新增列（SQLite 不支持 ADD COLUMN IF NOT EXISTS）
+    :return: 是否新增了该列
+    """
+    text = get_db().text
+    columns = {row[1] for row in conn.execute(text(f'PRAGMA table_info({table})'))}
+    if column in columns:
+        return False
+    conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {definition}'))
+    return True
+
+
+def _replace_column_definition(create_sql, column, definition):
+    """替换 CREATE TABLE 语句中某一列的定义（按括号层级定位列定义的结束位置）"""
+    match = re.search(rf'[(,]\s*"?{column}"?\s', create_sql)
+    if not match:
+        raise ValueError(f'建表语句中未找到列 {column}')
+    start = match.start() + 1
+    depth = 0
+    end = start
+    while end < len(create_sql):
+        char = create_sql[end]
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            if depth == 0:
+                break
+            depth -= 1
+        elif char == ',' and depth == 0:
+            break
+        end += 1
+    return f'{create_sql[:start]}\n    {column} {definition}{create_sql[end:]}'
+
+
+def rebuild_table(conn, table, column, definition, value_sql):
+    """修改已存在表中某一列的类型/默认值并换算已有数据（SQLite 不支持 ALTER COLUMN）
+    按 SQLite 推荐的步骤重建：新建临时表 -> 复制数据 -> 删除原表 -> 重命名，
+    原表上的索引、触发器及自增序列在重建后恢复；其余列（含 ensure_column 追加的列）保持不变
+    :param definition: 新的列定义，如 'INTEGER DEFAULT 0'
+    :param value_sql: 复制数据时该列取值的 SQL 表达式（可引用原列）
+    """
+    text = get_db().text
+    rebuilt = f'{table}__rebuild'
+    create_sql = conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': table}).fetchone()[0]
+    dependents = [row[0] for row in conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = :name AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+    ), {'name': table})]
+    columns = [row[1] for row in conn.execute(text(f'PRAGMA table_info({table})'))]
+    sequence = conn.execute(text('SELECT seq FROM sqlite_sequence WHERE name = :name'), {'name': table}).fetchone()
+
+    create_sql = re.sub(rf'^CREATE TABLE\s+"?{table}"?', f'CREATE TABLE {rebuilt}', create_sql, count=1)
+    create_sql = _replace_column_definition(create_sql, column, definition)
+    select_list = ', '.join(value_sql if name == column else name for name in columns)
+
+    # 项目未启用外键约束；此处防御性关闭，避免删除原表时触发 ON DELETE CASCADE
+    conn.execute(text('PRAGMA foreign_keys = OFF'))
+    # 上次中断遗留的临时表
+    conn.execute(text(f'DROP TABLE IF EXISTS {rebuilt}'))
+    conn.execute(text(create_sql))
+    conn.execute(text(f'INSERT INTO {rebuilt} ({", ".join(columns)}) SELECT {select_list} FROM {table}'))
+    conn.execute(text(f'DROP TABLE {table}'))
+    conn.execute(text(f'ALTER TABLE {rebuilt} RENAME TO {table}'))
+    for sql in dependents:
+        conn.execute(text(sql))
+    if sequence:
+        # 保留历史最大ID，已删除记录的ID不被复用
+        conn.execute(text('UPDATE sqlite_sequence SET seq = :seq WHERE name = :name'), {'seq': sequence[0], 'name': table})
@@ -0,0 +1,178 @@
+from models.catalog_change import CatalogChange
+from models.category import Category
+from models.navs import Nav
+from utils.cached_response import VersionedPayloadCache
+
+# 主页数据受众：匿名访问 / 携带Token访问
+AUDIENCE_ANONYMOUS = 'anonymous'
+AUDIENCE_TOKEN = 'token'
+
+
+def _home_sorted(items):
+    """主页排序规则：sort_order 升序，相同 sort_order 按 created_at（精确到秒）降序，其余保持原顺序
+    两次稳定排序实现，直接比较整数秒，不解析为 datetime
+    """
+    items = sorted(items, key=lambda item: item.created_at_epoch or 0, reverse=True)
+    items.sort(key=lambda item: item.sort_order)
+    return items
+
+
+def _category_to_home_dict(category):
+    """分类转换为主页数据格式（is_public 以 0/1 返回）"""
+    return {
+        'id': category.id,
+        'parent_id': category.parent_id,
+        'name': category.name,
+        'description': category.description,
+        'sort_order': category.sort_order,
+        'level': category.level,
+        'is_public': int(category.is_public) if category.is_public is not None else 1,
+        'created_at': category.created_at_text,
+    }
+
+
+def build_home_data(has_token, skeleton=False):
+    """构建主页层级数据（顶级分类 -> 子分类（任意层级） -> 导航项）
+    可达分类读取进程内分类树缓存、一次查询获取导航项，在内存中组装树结构，避免逐分类查询（N+1）；
+    骨架模式的 nav_count 直接取分类树节点上的导航项计数，不查询导航项
+    - 顶级分类只有 children
+    - 非顶级分类带 navs（骨架模式为 nav_count），存在下级分类时额外带 children
+    :param has_token: 是否携带有效JWT Token；无Token时仅返回公开导航项
+    :param skeleton: 骨架模式，子分类只返回 nav_count，导航项按分类单独分页加载
+    :return: list[dict]，结构与《用户端-主页面JSON对接文档》一致
+    """
+    categories = Category.get_tree_nodes()
+    nav_filters = None if has_token else {'is_public': True}
+    if not skeleton:
+        navs = Nav.get_all(nav_filters, sort='sort_order')
+
+    # 按 parent_id / category_id 分组（保持 SQL 返回顺序，后续稳定排序）
+    children_map = {}
+    for category in categories:
+        children_map.setdefault(category.parent_id, []).append(category)
+    for parent_id, siblings in children_map.items():
+        children_map[parent_id] = _home_sorted(siblings)
+
+    navs_map = {}
+    if not skeleton:
+        for nav in navs:
+            navs_map.setdefault(nav.category_id, []).append(nav)
+
+    def build_node(category):
+        data = _category_to_home_dict(category)
+        children = children_map.get(category.id, [])
+
+        if category.depth == 1:
+            data['children'] = [build_node(child) for child in children]
+            return data
+
+        # 如果没有Token且分类（或其非顶级祖先）不公开，navs设为空数组
+        if not has_token and not category.visible:
+            if skeleton:
+                data['nav_count'] = 0
+            else:
+                data['navs'] = []
+        elif skeleton:
+            data['nav_count'] = category.nav_count if has_token else category.public_nav_count
+        else:
+            category_navs = _home_sorted(navs_map.get(category.id, []))
+            data['navs'] = [nav.to_dict() for nav in category_navs]
+
+        if children:
+            data['children'] = [build_node(child) for child in children]
+        return data
+
+    return [build_node(top_category) for top_category in children_map.get(None, [])]
+
+
+def build_home_changes(since, has_token):
+    """构建增量同步数据：返回 since 版本之后变更的分类与导航项
+    - 同一实体只按最后一次操作下发：存在且可见为 upserted，否则为 deleted
+    - 无Token时分类变更可能改变其下导航项的可见性，受影响子树的导航项会一并下发
+    - since 须取自全量数据（/api/web/home 响应头 X-Catalog-Version）；
+      早于日志压缩下界或不合法时返回 full_resync，客户端需重新拉取 /api/web/home
+    :return: dict
+    """
+    current = CatalogChange.current_version()
+    if since is None or since < 0 or since > current or since < CatalogChange.floor_version():
+        return {'version': current, 'full_resync': True}
+
+    changes, current = CatalogChange.since(since)
+    category_ids = [c.entity_id for c in changes if c.entity == CatalogChange.ENTITY_CATEGORY]
+    nav_ids = [c.entity_id for c in changes if c.entity == CatalogChange.ENTITY_NAV]
+
+    result = {
+        'version': current,
+        'full_resync': False,
+        'categories': {'upserted': [], 'deleted': []},
+        'navs': {'upserted': [], 'deleted': []}
+    }
+    if not changes:
+        return result
+
+    nodes = {}
+    if category_ids or (nav_ids and not has_token):
+        nodes = {category.id: category for category in Category.get_tree_nodes()}
+
+    for category_id in category_ids:
+        node = nodes.get(category_id)
+        if node:
+            result['categories']['upserted'].append(_category_to_home_dict(node))
+        else:
+            result['categories']['deleted'].append(category_id)
+
+    def nav_visible(nav):
+        if has_token:
+            return True
+        node = nodes.get(nav.category_id)
+        return bool(nav.is_public) and node is not None and node.depth > 1 and node.visible
+
+    upserted_navs = {}
+    deleted_navs = set(nav_ids)
+    for nav in Nav.get_all({'ids': nav_ids}) if nav_ids else []:
+        if nav_visible(nav):
+            deleted_navs.discard(nav.id)
+            upserted_navs[nav.id] = nav
+
+    if category_ids and not has_token:
+        # 变更分类及其全部后代：可见性可能随祖先变化
+        children_map = {}
+        for node in nodes.values():
+            children_map.setdefault(node.parent_id, []).append(node.id)
+        affected = set()
+        stack = [cid for cid in category_ids if cid in nodes]
+        while stack:
+            cid = stack.pop()
+            if cid not in affected:
+                affected.add(cid)
+                stack.extend(children_map.get(cid, []))
+        for nav in Nav.get_all({'category_ids': affected}) if affected else []:
+            if nav_visible(nav):
+                deleted_navs.discard(nav.id)
+                upserted_navs[nav.id] = nav
+            elif nav.id not in upserted_navs:
+                deleted_navs.add(nav.id)
+
+    result['navs']['upserted'] = [nav.to_dict() for nav in upserted_navs.values()]
+    result['navs']['deleted'] = sorted(deleted_navs)
+    return result
+
+
+class HomeCache(VersionedPayloadCache):
+    """主页数据进程内缓存
+    按受众（匿名 / Token）分别缓存，目录版本号变化时才重新构建并序列化
+    """
+
+    def get(self, has_token, skeleton=False):
+        """获取主页数据快照（CachedPayload），版本未变化时直接返回缓存"""
+        audience = AUDIENCE_TOKEN if has_token else AUDIENCE_ANONYMOUS
+        key = f'{audience}:skeleton' if skeleton else audience
+        # 构建前记录变更日志版本：客户端据此增量同步，构建期间的变更会被重复下发（幂等）
+        return self.get_payload(
+            key,
+            lambda: build_home_data(has_token, skeleton),
+            headers=lambda: {'X-Catalog-Version': str(CatalogChange.current_version())}
+        )
+
+
+home_cache = HomeCache()
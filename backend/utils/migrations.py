@@ -0,0 +1,161 @@
+from models.catalog_change import CatalogChange
+from models.category import Category
+from models.navs import Nav
+from utils.db import get_connection, commit, ensure_column, rebuild_table
+from utils.search import bigram_keys
+from utils.timestamps import EPOCH_COLUMN_DEFINITION, EPOCH_FROM_TEXT_SQL
+
+
+def get_db():
+    from flask import current_app
+    return current_app.extensions['sqlalchemy']
+
+
+def _add_pinyin_columns(conn, text):
+    """导航项标题 / 分类名称的拼音检索键及前缀索引"""
+    ensure_column(conn, 'navs', 'title_pinyin', 'TEXT')
+    ensure_column(conn, 'navs', 'title_initials', 'TEXT')
+    ensure_column(conn, 'nav_categories', 'name_pinyin', 'TEXT')
+    ensure_column(conn, 'nav_categories', 'name_initials', 'TEXT')
+    conn.execute(text('CREATE INDEX IF NOT EXISTS idx_navs_title_pinyin ON navs (title_pinyin)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS idx_navs_title_initials ON navs (title_initials)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS idx_nav_categories_name_pinyin ON nav_categories (name_pinyin)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS idx_nav_categories_name_initials ON nav_categories (name_initials)'))
+
+
+def _add_listing_indexes(conn, text):
+    """与实际查询形态匹配的复合索引，过滤与 ORDER BY 均可走索引，避免全表扫描和临时B树排序
+    - 分类下导航项（主页按分类分页加载，按分类计数）：category_id, is_public, sort_order, created_at DESC, id
+    - 全部公开导航项（主页数据）：is_public, sort_order, created_at
+    - 默认排序及其游标分页：sort_order, created_at, id
+    - 按创建时间排序及其游标分页：created_at, id
+    - 子分类（递归查询分类树、get_children）：parent_id, sort_order, created_at
+    """
+    conn.execute(text('''
+        CREATE INDEX IF NOT EXISTS idx_navs_category_public_sort
+        ON navs (category_id, is_public, sort_order, created_at DESC, id)
+    '''))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS idx_navs_public_sort ON navs (is_public, sort_order, created_at)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS idx_navs_sort ON navs (sort_order, created_at, id)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS idx_navs_created ON navs (created_at, id)'))
+    conn.execute(text('''
+        CREATE INDEX IF NOT EXISTS idx_nav_categories_parent_sort
+        ON nav_categories (parent_id, sort_order, created_at)
+    '''))
+    conn.execute(text('ANALYZE'))
+
+
+def _epoch_timestamps(conn, text):
+    """导航项/分类的 created_at 由时间字符串改为整数秒（epoch）
+    整数比较与排序比字符串更快、索引更紧凑，读取时无需解析；接口输出格式不变（见 utils.timestamps）
+    列同时改为 NOT NULL，游标分页的行值比较可直接走索引定位
+    列已是 INTEGER NOT NULL（新建的表）时只换算残留的字符串值；重建表后重新统计索引
+    """
+    for table in ('navs', 'nav_categories'):
+        declared = {row[1]: ((row[2] or '').upper(), row[3]) for row in conn.execute(text(f'PRAGMA table_info({table})'))}
+        if declared.get('created_at') == ('INTEGER', 1):
+            conn.execute(text(f"UPDATE {table} SET created_at = {EPOCH_FROM_TEXT_SQL} WHERE typeof(created_at) = 'text'"))
+        else:
+            rebuild_table(conn, table, 'created_at', EPOCH_COLUMN_DEFINITION, EPOCH_FROM_TEXT_SQL)
+    conn.execute(text('ANALYZE'))
+
+
+def _add_category_name_index(conn, text):
+    """分类名称不区分大小写查找（LOWER(name) = LOWER(:name)）的表达式索引，导入导航项时按名称解析分类"""
+    conn.execute(text('CREATE INDEX IF NOT EXISTS idx_nav_categories_lower_name ON nav_categories (LOWER(name))'))
+
+
+def _add_category_closure(conn, text):
+    """分类闭包表 nav_category_closure 及维护触发器（见 Category.create_closure）"""
+    Category.create_closure(conn, text)
+
+
+def _add_category_nav_counts(conn, text):
+    """分类导航项计数表 nav_category_counts 及维护触发器（见 Category.create_nav_counts）"""
+    Category.create_nav_counts(conn, text)
+
+
+def _add_bigram_columns(conn, text):
+    """导航项标题/描述的 bigram 检索键并回填，两个字符的子串检索走 navs_bigram 索引（见 Nav.create_fts）"""
+    ensure_column(conn, 'navs', 'title_bigrams', 'TEXT')
+    ensure_column(conn, 'navs', 'description_bigrams', 'TEXT')
+    params = [
+        {'id': row[0], 'title_bigrams': bigram_keys(row[1]), 'description_bigrams': bigram_keys(row[2])}
+        for row in conn.execute(text('SELECT id, title, description FROM navs'))
+    ]
+    if params:
+        conn.execute(text(
+            'UPDATE navs SET title_bigrams = :title_bigrams, description_bigrams = :description_bigrams WHERE id = :id'
+        ), params)
+
+
+def _add_nav_fts(conn, text):
+    """导航项全文索引 navs_fts / navs_trgm / navs_bigram 及同步触发器（见 Nav.create_fts）"""
+    Nav.create_fts(conn, text)
+
+
+def _add_category_fts(conn, text):
+    """分类名称/描述 trigram 全文索引 nav_categories_trgm 及同步触发器（见 Category.create_fts）"""
+    Category.create_fts(conn, text)
+
+
+def _add_catalog_change_log(conn, text):
+    """目录变更日志 catalog_changes、元数据 catalog_meta（含目录版本号）及日志触发器（见 CatalogChange.create_table）"""
+    CatalogChange.create_table(conn, text)
+
+
+# 结构迁移：(版本号, 说明, 迁移函数)，版本号递增，已发布的迁移不可修改，只能追加
+MIGRATIONS = [
+    (1, '导航项/分类拼音检索键', _add_pinyin_columns),
+    (2, '导航项/分类列表复合索引', _add_listing_indexes),
+    (3, '导航项/分类创建时间改为整数秒', _epoch_timestamps),
+    (4, '分类名称不区分大小写索引', _add_category_name_index),
+    (5, '分类闭包表', _add_category_closure),
+    (6, '分类导航项计数', _add_category_nav_counts),
+    (7, '导航项 bigram 检索键', _add_bigram_columns),
+    (8, '导航项全文索引', _add_nav_fts),
+    (9, '分类全文索引', _add_category_fts),
+    (10, '目录变更日志与元数据', _add_catalog_change_log),
+]
+
+
+def current_schema_version(conn, text):
+    """当前数据库结构版本（未执行过迁移时为0）"""
+    return conn.execute(text('SELECT COALESCE(MAX(version), 0) FROM schema_version')).fetchone()[0]
+
+
+def run_migrations(migrations=None):
+    """执行尚未应用的结构迁移，每个版本只执行一次
+    每个迁移执行后与其 schema_version 记录一起提交，失败时回滚并抛出异常，后续版本不再执行；
+    SQLite 驱动下 DDL 不保证处于同一事务，迁移函数须可重复执行（IF NOT EXISTS / ensure_column）
+    需在各表 create_table 之后调用
+    :return: 本次应用的版本号列表
+    """
+    db = get_db()
+    migrations = MIGRATIONS if migrations is None else migrations
+    applied = []
+    with get_connection() as conn:
+        conn.execute(db.text('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        '''))
+        commit(conn)
+
+        current = current_schema_version(conn, db.text)
+        for version, description, migrate in sorted(migrations, key=lambda m: m[0]):
+            if version <= current:
+                continue
+            try:
+                migrate(conn, db.text)
+                conn.execute(db.text(
+                    'INSERT INTO schema_version (version, description) VALUES (:version, :description)'
+                ), {'version': version, 'description': description})
+                commit(conn)
+            except Exception:
+                conn.rollback()
+                raise
+            applied.append(version)
+    return applied
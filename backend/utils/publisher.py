@@ -0,0 +1,120 @@
+import json
+import os
+import re
+import tempfile
+import threading
+
+from flask import request
+
+from utils.catalog import get_catalog_version
+from utils.db import UNIT_OF_WORK_METHODS
+from utils.home import home_cache
+
+# 静态快照文件名：home.<摘要前12位>.json（内容不可变，可长期缓存）+ 指针文件 home-latest.json
+SNAPSHOT_PREFIX = 'home.'
+SNAPSHOT_POINTER = 'home-latest.json'
+SNAPSHOT_PATTERN = re.compile(r'^home\.[0-9a-f]{12}\.json(\.gz)?$')
+
+
+def _atomic_write(path, content):
+    """先写入同目录临时文件再 rename，读取方不会看到写了一半的文件"""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class HomeSnapshotPublisher:
+    """匿名主页数据静态发布器
+    目录版本变化后，将匿名主页 JSON 以哈希文件名写入 web 目录并更新指针文件，
+    由 Nginx/Apache 直接提供静态文件，无需经过 Python
+    """
+
+    def __init__(self, output_dir=None, keep=3):
+        self.output_dir = output_dir
+        self.keep = keep
+        self.published_version = None
+        self.published_file = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """注册到 Flask 应用：写请求结束后（及本进程首个请求）检查目录版本，有变更则发布"""
+        if not app.config.get('HOME_SNAPSHOT_ENABLED', True):
+            return
+        self.output_dir = app.config.get('HOME_SNAPSHOT_DIR') or self.output_dir
+        if not self.output_dir:
+            return
+
+        @app.after_request
+        def publish_home_snapshot(response):
+            # 只读请求不会改变目录，不读取版本号
+            if self.published_version is not None and request.method not in UNIT_OF_WORK_METHODS:
+                return response
+            try:
+                if self.published_version != get_catalog_version():
+                    self.publish()
+            except Exception as e:
+                # 发布失败（含读取版本号失败）不影响当前请求，客户端会回退到 /api/web/home
+                app.logger.error(f'主页静态快照发布失败: {e}')
+            return response
+
+    def publish(self):
+        """发布当前目录版本的匿名主页快照（需在应用上下文中调用）
+        :return: 快照文件名
+        """
+        with self._lock:
+            version = get_catalog_version()
+            if self.published_version == version:
+                return self.published_file
+
+            payload = home_cache.get(False)
+            filename = f'{SNAPSHOT_PREFIX}{payload.etag[:12]}.json'
+            os.makedirs(self.output_dir, exist_ok=True)
+
+            path = os.path.join(self.output_dir, filename)
+            if not os.path.exists(path):
+                _atomic_write(path, payload.body)
+                # 同时提供预压缩版本（Nginx gzip_static / Apache MultiViews 可直接使用）
+                body, _, encoding = payload.variant('gzip')
+                if encoding == 'gzip':
+                    _atomic_write(path + '.gz', body)
+
+            # 指针文件最后更新：客户端读到新指针时，快照文件一定已就绪
+            pointer = json.dumps({
+                'file': filename,
+                'etag': payload.etag,
+                'version': payload.version,
+                # 增量同步起点，配合 /api/web/home/changes?since= 使用
+                'sync_version': int(payload.headers.get('X-Catalog-Version', 0))
+            }).encode('utf-8')
+            _atomic_write(os.path.join(self.output_dir, SNAPSHOT_POINTER), pointer)
+
+            self._cleanup(filename)
+            self.published_version = payload.version
+            self.published_file = filename
+            return filename
+
+    def _cleanup(self, current):
+        """仅保留最近 keep 个快照，给仍持有旧指针的客户端留出读取时间"""
+        snapshots = []
+        for name in os.listdir(self.output_dir):
+            if SNAPSHOT_PATTERN.match(name) and not name.endswith('.gz'):
+                snapshots.append((os.path.getmtime(os.path.join(self.output_dir, name)), name))
+        snapshots.sort(reverse=True)
+        for _, name in snapshots[self.keep:]:
+            if name == current:
+                continue
+            for stale in (name, name + '.gz'):
+                stale_path = os.path.join(self.output_dir, stale)
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+
+
+home_publisher = HomeSnapshotPublisher()
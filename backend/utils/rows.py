@@ -0,0 +1,12 @@
+from operator import itemgetter
+
+
+def row_getter(fields, columns):
+    """按列名取值：返回将结果行转换为 columns 顺序元组的函数
+    列位置按结果集字段名（Row._fields）只解析一次，查询列顺序变化或追加列不影响模型构建
+    """
+    positions = [fields.index(column) for column in columns]
+    if len(positions) == 1:
+        position = positions[0]
+        return lambda row: (row[position],)
+    return itemgetter(*positions)
@@ -0,0 +1,186 @@
+import re
+
+# pypinyin 为可选依赖：未安装时不生成拼音检索键，拼音检索不可用
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:
+    lazy_pinyin = None
+
+# 中日韩文字：unicode61 分词器会把整段连续文字视为一个词，需走 trigram 索引做子串匹配
+CJK_PATTERN = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]')
+
+# trigram 分词器只能索引长度不小于3的子串
+TRIGRAM_MIN_LENGTH = 3
+
+# 两个字符的词（如“开发”“工具”）走 bigram 检索键：文本中相邻两个字符组成的词，空格分隔，由 unicode61 索引按词匹配
+BIGRAM_LENGTH = 2
+
+# 拼音检索键只保留小写字母和数字
+_PINYIN_WORD_PATTERN = re.compile(r'[a-z0-9]+')
+PINYIN_KEYWORD_PATTERN = re.compile(r'^(?=.*[a-z])[a-z0-9]+$')
+
+# 全文索引表是否存在（进程内缓存检测结果）
+_fts_tables = {}
+
+
+def split_terms(keyword):
+    """按空白拆分关键词"""
+    return [t for t in re.split(r'\s+', (keyword or '').strip()) if t]
+
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def prefix_query(keyword):
+    """转换为 unicode61 FTS5 查询：每个词做前缀匹配并以 AND 连接"""
+    return ' AND '.join(_quote(t) + '*' for t in split_terms(keyword))
+
+
+def word_query(keyword):
+    """转换为 unicode61 词前缀查询，仅当每个词都是单个 unicode61 词（只含字母数字、不含中日韩文字）时可用，否则返回 None
+    含标点的词会被分词器拆开，如 c++ 变为 c*、node.js 变为 node js*，前缀匹配会命中 LIKE 不会命中的行
+    """
+    terms = split_terms(keyword)
+    if not terms or has_cjk(keyword) or not all(t.isalnum() for t in terms):
+        return None
+    return prefix_query(keyword)
+
+
+def trigram_query(keyword):
+    """转换为 trigram FTS5 查询：每个词做子串匹配并以 AND 连接
+    任一词短于3个字符时无法使用索引，返回 None（调用方回退到 LIKE）
+    """
+    terms = split_terms(keyword)
+    if not terms or any(len(t) < TRIGRAM_MIN_LENGTH for t in terms):
+        return None
+    return ' AND '.join(_quote(t) for t in terms)
+
+
+def bigram_keys(text):
+    """生成 bigram 检索键：小写后相邻两个字符（均为字母、数字或中日韩文字）组成的词，去重后空格分隔
+    如 '开发者Gitee' -> 'ee gi it te 发者 开发 者g'
+    """
+    text = (text or '').lower()
+    grams = {text[i:i + BIGRAM_LENGTH] for i in range(len(text) - 1)}
+    return ' '.join(sorted(gram for gram in grams if gram.isalnum()))
+
+
+def substring_queries(keyword):
+    """子串匹配的索引查询 (trigram 查询, bigram 查询)，各词之间为 AND
+    不短于3个字符的词走 trigram 索引，两个字符的词走 bigram 检索键，没有对应的词时该项为 None；
+    任一词无法使用索引（单个字符，或两个字符中含标点等）时返回 None（调用方回退到 LIKE）
+    """
+    terms = split_terms(keyword)
+    short_terms = [t.lower() for t in terms if len(t) < TRIGRAM_MIN_LENGTH]
+    if not terms or any(len(t) != BIGRAM_LENGTH or not t.isalnum() for t in short_terms):
+        return None
+    long_terms = [t for t in terms if len(t) >= TRIGRAM_MIN_LENGTH]
+    return (' AND '.join(_quote(t) for t in long_terms) or None,
+            ' AND '.join(_quote(t) for t in short_terms) or None)
+
+
+def has_cjk(keyword):
+    """关键词是否包含中日韩文字"""
+    return bool(CJK_PATTERN.search(keyword or ''))
+
+
+def fts_table_exists(conn, text, name):
+    """检测全文索引表是否存在，结果按表名缓存"""
+    if name not in _fts_tables:
+        row = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {'name': name}).fetchone()
+        _fts_tables[name] = row is not None
+    return _fts_tables[name]
+
+
+def set_fts_table_state(name, available):
+    """创建/检测失败后记录全文索引表可用性"""
+    _fts_tables[name] = available
+
+
+def create_fts_index(conn, text, table, fts_table, columns, tokenize=None):
+    """为 table 的 columns 创建外部内容 FTS5 索引及同步触发器，首次创建时回填
+    :param conn: 数据库连接
+    :param text: SQL 文本构造函数（db.text）
+    :param tokenize: 分词器，如 'trigram'；None 使用默认 unicode61
+    :return: 是否可用（SQLite 未编译 FTS5 或不支持该分词器时返回 False）
+    """
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': fts_table}).fetchone()
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'NEW.{c}' for c in columns)
+    old_values = ', '.join(f'OLD.{c}' for c in columns)
+    options = f", tokenize='{tokenize}'" if tokenize else ''
+    try:
+        conn.execute(text(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                {column_list}, content='{table}', content_rowid='id'{options}
+            )
+        '''))
+    except Exception as e:
+        # 建表失败不影响同一事务内已执行的语句（由结构迁移调用，不回滚整个迁移）
+        print(f"全文索引 {fts_table} 不可用，检索使用 LIKE: {str(e)}")
+        set_fts_table_state(fts_table, False)
+        return False
+
+    conn.execute(text(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{fts_table}_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {fts_table} (rowid, {column_list}) VALUES (NEW.id, {new_values});
+        END
+    '''))
+    conn.execute(text(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{fts_table}_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', OLD.id, {old_values});
+        END
+    '''))
+    conn.execute(text(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{fts_table}_update AFTER UPDATE OF {column_list} ON {table}
+        BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', OLD.id, {old_values});
+            INSERT INTO {fts_table} (rowid, {column_list}) VALUES (NEW.id, {new_values});
+        END
+    '''))
+    if not exists:
+        # 首次创建：从内容表回填索引
+        conn.execute(text(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')"))
+    set_fts_table_state(fts_table, True)
+    return True
+
+
+def pinyin_keys(text):
+    """生成拼音检索键 (全拼, 首字母)，均为小写字母数字，如 '开发者搜索' -> ('kaifazhesousuo', 'kfzss')
+    非中文片段按单词保留（全拼保留原词，首字母取各单词首字符）；多音字取常用读音
+    未安装 pypinyin 时返回 (None, None)
+    """
+    if lazy_pinyin is None:
+        return None, None
+    full, initials = [], []
+    for segment in lazy_pinyin(text or ''):
+        if has_cjk(segment):
+            continue
+        words = _PINYIN_WORD_PATTERN.findall(segment.lower())
+        full.extend(words)
+        initials.extend(word[0] for word in words)
+    return ''.join(full), ''.join(initials)
+
+
+def pinyin_keyword(keyword):
+    """关键词可按拼音检索时返回归一化后的检索键（去空白、小写），否则返回 None
+    仅由字母、数字、空白组成且包含字母的关键词才按拼音检索
+    """
+    if lazy_pinyin is None:
+        return None
+    key = re.sub(r'\s+', '', (keyword or '').lower())
+    if not key or not PINYIN_KEYWORD_PATTERN.match(key):
+        return None
+    return key
+
+
+def prefix_range(prefix):
+    """前缀匹配改写为范围条件 [lo, hi)，可直接使用普通B树索引（LIKE 'x%' 默认不走索引）"""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
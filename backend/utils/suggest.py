@@ -0,0 +1,219 @@
+import bisect
+import heapq
+import threading
+import time
+from urllib.parse import urlsplit
+
+from models.catalog_change import CatalogChange
+from models.category import Category
+from models.navs import Nav
+from utils.catalog import get_catalog_version, local_commit_count
+from utils.search import pinyin_keys
+
+# 建议条目类型
+KIND_CATEGORY = 'category'
+KIND_NAV = 'nav'
+
+# 单次最多返回的建议条数
+MAX_SUGGESTIONS = 20
+
+
+def _normalize(text):
+    """检索键归一化：去首尾空白、小写"""
+    return (text or '').strip().lower()
+
+
+def _host(url):
+    """提取URL主机名（去掉 www. 前缀），如 https://www.github.com/x -> github.com"""
+    url = (url or '').strip()
+    if not url:
+        return ''
+    if '://' not in url:
+        url = 'http://' + url
+    try:
+        host = urlsplit(url).hostname or ''
+    except ValueError:
+        return ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def _search_keys(text):
+    """名称/标题的检索键：原文、拼音全拼、拼音首字母"""
+    full, initials = pinyin_keys(text)
+    return {_normalize(text), full or '', initials or ''}
+
+
+class SuggestIndex:
+    """输入联想的进程内前缀索引（有序数组 + bisect）
+    - 收录匿名可见的分类名称，以及公开导航项的标题、主机名（均含拼音全拼/首字母）
+    - 检索只访问内存；目录版本号每 version_check_interval 秒最多读取一次（一条主键查询），
+      其余请求不访问 SQLite：本进程的写入立即反映到联想结果，其他进程的写入最迟在该间隔后反映
+    - 目录版本变化后，仅导航项变更时按变更日志增量更新，分类变更（可能影响整棵子树可见性）时全量重建
+    """
+
+    def __init__(self, version_check_interval=1):
+        self.version_check_interval = version_check_interval
+        self._checked = None      # 上次读取目录版本号时的 (time.monotonic(), 本进程目录变更提交次数)
+        self._lock = threading.Lock()
+        # (keys, entries)：keys 为有序数组 [(key, kind, id)]，entries 为 {(kind, id): (rank, item, keys)}
+        # 更新时复制后整体替换，检索无需加锁
+        self._index = ([], {})
+        self._visible_categories = {}  # 可挂载公开导航项的分类：id -> name
+        self.version = None       # 对应的目录版本号
+        self.sync_version = None  # 对应的变更日志版本号
+        self.rebuilds = 0
+        self.incremental_updates = 0
+
+    @staticmethod
+    def _add(index, kind, entity_id, rank, item, keys, ordered=True):
+        """加入一个条目
+        :param ordered: 是否保持检索键数组有序（逐个 insort）；全量重建时为 False，只追加，由调用方最后统一排序
+        """
+        sorted_keys, entries = index
+        keys = sorted(key for key in keys if key)
+        entries[(kind, entity_id)] = (rank, item, keys)
+        if ordered:
+            for key in keys:
+                bisect.insort(sorted_keys, (key, kind, entity_id))
+        else:
+            sorted_keys.extend((key, kind, entity_id) for key in keys)
+
+    @staticmethod
+    def _remove(index, kind, entity_id):
+        sorted_keys, entries = index
+        entry = entries.pop((kind, entity_id), None)
+        if not entry:
+            return
+        for key in entry[2]:
+            position = bisect.bisect_left(sorted_keys, (key, kind, entity_id))
+            if position < len(sorted_keys) and sorted_keys[position] == (key, kind, entity_id):
+                del sorted_keys[position]
+
+    def _add_nav(self, index, nav, ordered=True):
+        category_name = self._visible_categories.get(nav.category_id)
+        if category_name is None or not nav.is_public:
+            return
+        created = -(nav.created_at_epoch or 0)
+        item = {
+            'type': KIND_NAV,
+            'id': nav.id,
+            'title': nav.title,
+            'url': nav.url,
+            'icon': nav.icon,
+            'category_id': nav.category_id,
+            'category_name': category_name
+        }
+        keys = _search_keys(nav.title)
+        keys.add(_host(nav.url))
+        self._add(index, KIND_NAV, nav.id, (nav.sort_order or 0, created, 1, nav.id), item, keys, ordered)
+
+    def _rebuild(self):
+        """全量重建（调用方持有锁）：先收集全部检索键再排序一次，O(n log n)，避免逐个 insort 的 O(n²)"""
+        sync_version = CatalogChange.current_version()
+        nodes = Category.get_tree_nodes()
+        navs = Nav.get_all({'is_public': True})
+
+        index = ([], {})
+        self._visible_categories = {
+            node.id: node.name for node in nodes if node.depth > 1 and node.visible
+        }
+        for node in nodes:
+            if not node.visible:
+                continue
+            created = -(node.created_at_epoch or 0)
+            item = {
+                'type': KIND_CATEGORY,
+                'id': node.id,
+                'name': node.name,
+                'parent_id': node.parent_id
+            }
+            self._add(index, KIND_CATEGORY, node.id, (node.sort_order or 0, created, 0, node.id), item,
+                      _search_keys(node.name), ordered=False)
+        for nav in navs:
+            self._add_nav(index, nav, ordered=False)
+        index[0].sort()
+        self._index = index
+        self.sync_version = sync_version
+        self.rebuilds += 1
+
+    def _apply_changes(self):
+        """按变更日志增量更新（调用方持有锁），无法增量时返回 False"""
+        if self.sync_version is None or self.sync_version < CatalogChange.floor_version():
+            return False
+        changes, current = CatalogChange.since(self.sync_version)
+        if any(change.entity == CatalogChange.ENTITY_CATEGORY for change in changes):
+            return False
+
+        nav_ids = [change.entity_id for change in changes]
+        index = (list(self._index[0]), dict(self._index[1]))
+        for nav_id in nav_ids:
+            self._remove(index, KIND_NAV, nav_id)
+        for nav in Nav.get_all({'ids': nav_ids}) if nav_ids else []:
+            self._add_nav(index, nav)
+        self._index = index
+        self.sync_version = current
+        self.incremental_updates += 1
+        return True
+
+    def refresh(self):
+        """目录版本变化时同步索引
+        距上次检查不足 version_check_interval 秒且本进程无写入时直接使用现有索引，不访问数据库
+        """
+        checked = self._checked
+        if (checked is not None and checked[1] == local_commit_count()
+                and time.monotonic() - checked[0] < self.version_check_interval):
+            return
+        with self._lock:
+            # 双重检查：等待锁期间可能已被其他请求检查或更新
+            if self._checked is not checked:
+                return
+            commits = local_commit_count()
+            version = get_catalog_version()
+            self._checked = (time.monotonic(), commits)
+            if self.version == version:
+                return
+            if self.version is None or not self._apply_changes():
+                self._rebuild()
+            # 以更新前读取的版本号记录：更新期间若有写入，下次请求会再次同步
+            self.version = version
+
+    def suggest(self, query, limit=10):
+        """
+        前缀联想：返回检索键以 query 开头的条目
+        排序：完全匹配优先，其次 sort_order 升序、created_at 降序，同等条件下分类在前
+        :return: list[dict]
+        """
+        prefix = _normalize(query)
+        if not prefix:
+            return []
+        self.refresh()
+
+        keys, entries = self._index
+        matched = {}
+        position = bisect.bisect_left(keys, (prefix,))
+        while position < len(keys) and keys[position][0].startswith(prefix):
+            key, kind, entity_id = keys[position]
+            exact = key == prefix
+            if not matched.get((kind, entity_id)):
+                matched[(kind, entity_id)] = exact
+            position += 1
+
+        best = heapq.nsmallest(
+            min(limit, MAX_SUGGESTIONS),
+            ((not exact, entries[ref][0], ref) for ref, exact in matched.items())
+        )
+        return [entries[ref][1] for _, _, ref in best]
+
+    def stats(self):
+        """索引统计"""
+        return {
+            'version': self.version,
+            'sync_version': self.sync_version,
+            'entries': len(self._index[1]),
+            'keys': len(self._index[0]),
+            'rebuilds': self.rebuilds,
+            'incremental_updates': self.incremental_updates
+        }
+
+
+suggest_index = SuggestIndex()
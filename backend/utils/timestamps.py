@@ -0,0 +1,120 @@
+import calendar
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+# 接口返回的时间格式
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# navs / nav_categories 的 created_at 以整数秒（epoch）存储，按 UTC 与 'YYYY-MM-DD HH:MM:SS' 互相换算：
+# 迁移前存储的时间字符串换算为整数后再格式化，输出与原字符串一致（不涉及时区转换）
+EPOCH = datetime(1970, 1, 1)
+SECONDS_PER_DAY = 86400
+
+# 建表时 created_at 的列定义，及把 created_at 中的时间字符串换算为整数秒的 SQL 表达式
+# created_at 不允许为空：游标分页按 (sort_order, created_at, id) 行值比较，列中有 NULL 时无法走索引定位；
+# 为空或无法解析的旧值换算为0（与原先排序时把空值视为0一致）
+EPOCH_COLUMN_DEFINITION = "INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))"
+EPOCH_FROM_TEXT_SQL = (
+    "COALESCE(CASE WHEN typeof(created_at) = 'text' THEN CAST(strftime('%s', created_at) AS INTEGER) "
+    "ELSE created_at END, 0)"
+)
+
+
+def parse_timestamp(raw):
+    """解析数据库中的时间（整数秒或时间字符串），为空或无法解析时返回 None"""
+    if raw is None or raw == '':
+        return None
+    if isinstance(raw, datetime):
+        return raw
+    if isinstance(raw, int):
+        return EPOCH + timedelta(seconds=raw)
+    try:
+        return datetime.fromisoformat(raw)
+    except (ValueError, TypeError):
+        return None
+
+
+def to_epoch(value):
+    """转换为整数秒（epoch），用于写入 navs / nav_categories；无法转换时返回 None"""
+    if isinstance(value, int) or value is None:
+        return value
+    if not isinstance(value, datetime):
+        value = parse_timestamp(value)
+        if value is None:
+            return None
+    return calendar.timegm(value.utctimetuple())
+
+
+# 00-59 的两位数字符串，格式化时分秒时直接查表
+_TWO_DIGITS = tuple(f'{i:02d}' for i in range(60))
+
+
+@lru_cache(maxsize=4096)
+def _format_day(days):
+    """第 days 天（自 1970-01-01 起）的日期部分 'YYYY-MM-DD '，同一天的时间共用缓存"""
+    return (EPOCH + timedelta(days=days)).strftime('%Y-%m-%d ')
+
+
+def format_epoch(seconds):
+    """整数秒格式化为 'YYYY-MM-DD HH:MM:SS'：日期部分按天缓存，时分秒查表拼接，不构造 datetime"""
+    days, rest = divmod(seconds, SECONDS_PER_DAY)
+    hours, rest = divmod(rest, 3600)
+    minutes, secs = divmod(rest, 60)
+    return _format_day(days) + _TWO_DIGITS[hours] + ':' + _TWO_DIGITS[minutes] + ':' + _TWO_DIGITS[secs]
+
+
+def format_timestamp(raw):
+    """将数据库中的时间（整数秒或时间字符串）格式化为 'YYYY-MM-DD HH:MM:SS'
+    ISO 格式字符串（'YYYY-MM-DD HH:MM:SS[.ffffff]' 或以 T 分隔）直接截取，不经过 datetime 解析再格式化
+    """
+    if raw is None or raw == '':
+        return None
+    if isinstance(raw, int):
+        return format_epoch(raw)
+    if isinstance(raw, datetime):
+        return raw.strftime(TIMESTAMP_FORMAT)
+    if len(raw) >= 19 and raw[4] == '-' and raw[10] in ' T':
+        return raw[:10] + ' ' + raw[11:19]
+    value = parse_timestamp(raw)
+    return value.strftime(TIMESTAMP_FORMAT) if value else None
+
+
+class LazyTimestamp:
+    """时间字段描述符：保存数据库原始值（整数秒或时间字符串），首次访问时才解析为 datetime
+    所在类需在 __slots__ 中声明 _<字段名> 与 _<字段名>_raw；
+    赋值 datetime 时丢弃原始值
+    """
+
+    def __set_name__(self, owner, name):
+        self.value_attr = f'_{name}'
+        self.raw_attr = f'_{name}_raw'
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = getattr(instance, self.value_attr)
+        if value is None:
+            value = parse_timestamp(getattr(instance, self.raw_attr))
+            setattr(instance, self.value_attr, value)
+        return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.value_attr, value)
+        setattr(instance, self.raw_attr, None)
+
+    def text(self, instance):
+        """格式化后的时间字符串：有原始值时直接格式化，不触发解析"""
+        raw = getattr(instance, self.raw_attr)
+        if raw is not None:
+            return format_timestamp(raw)
+        value = getattr(instance, self.value_attr)
+        return value.strftime(TIMESTAMP_FORMAT) if value else None
+
+    def epoch(self, instance):
+        """整数秒（epoch），用于写入与排序；原始值已是整数时直接返回，不触发解析"""
+        raw = getattr(instance, self.raw_attr)
+        if isinstance(raw, int):
+            return raw
+        if raw is not None:
+            return to_epoch(raw)
+        return to_epoch(getattr(instance, self.value_attr))